@@ -1,11 +1,216 @@
+import argparse
 import subprocess
 import sys
 import os
 from datetime import datetime
 
+from utils.html_report import write_report_from_junit
+from utils.parallel import merge_junit_reports
+from utils.results import cases_from_junit
+from utils.regression import detect_regressions, format_comparisons
+from utils.results_store import ResultsStore, run_target
+from utils.targets import compare_targets, format_comparison, target_labels, write_comparison
+from utils.timings import merge_latency_reports
+from utils.warm_runner import (
+    RemoteRun,
+    WarmRunnerServer,
+    format_import_profile,
+    profile_imports,
+    run_via_server,
+    server_available,
+    stop_server,
+)
 
-def run_tests_with_reports():
-    """Запуск тестов с генерацией различных отчетов"""
+DEFAULT_BASE_URL = "https://jsonplaceholder.typicode.com"
+
+# Код выхода pytest, когда воркеру не досталось ни одного теста
+NO_TESTS_COLLECTED = 5
+
+
+def start_pytest(cmd, log_path, via_server=False):
+    """Запуск воркера pytest: отдельным процессом или на сервере запусков.
+
+    Вывод каждого воркера пишется в свой файл log_path: через общий канал
+    воркер, чей вывод еще не читается, блокировался бы на заполненном буфере.
+    """
+    if via_server:
+        return RemoteRun(cmd[3:], log_path)
+    with open(log_path, "w", encoding="utf-8") as log:
+        return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+
+
+def finish_pytest(process, log_path):
+    """Ожидание завершения воркера; возвращает его вывод, лог-файл удаляется"""
+    process.wait()
+    with open(log_path, encoding="utf-8", errors="replace") as log:
+        output = log.read()
+    os.remove(log_path)
+    return output
+
+
+def run_parallel(test_file_path, workers, timestamp, pytest_args=(), via_server=False):
+    """Параллельный прогон: каждый воркер — отдельный процесс pytest со своим пулом ApiClient"""
+    worker_reports = []
+    worker_latency_reports = []
+    processes = []
+    # Ограничитель частоты (--api-rate-limit) общий для всех воркеров
+    rate_limit_file = f"reports/rate_limit_{timestamp}.state"
+    for index in range(workers):
+        worker_report = f"reports/test_results_{timestamp}_worker{index}.xml"
+        worker_reports.append(worker_report)
+        worker_latency_report = f"reports/latency_{timestamp}_worker{index}.json"
+        worker_latency_reports.append(worker_latency_report)
+        worker_log = f"reports/worker_{timestamp}_{index}.log"
+        cmd = [sys.executable, "-m", "pytest", test_file_path,
+               "-v",
+               f"--worker-index={index}",
+               f"--worker-count={workers}",
+               f"--junitxml={worker_report}",
+               f"--latency-report={worker_latency_report}",
+               f"--api-rate-limit-file={rate_limit_file}",
+               *pytest_args]
+        print(f"📋 Воркер {index}: {' '.join(cmd)}")
+        processes.append((start_pytest(cmd, worker_log, via_server), worker_log))
+
+    return_codes = []
+    for index, (process, worker_log) in enumerate(processes):
+        output = finish_pytest(process, worker_log)
+        print("-" * 50)
+        print(f"Вывод воркера {index}:")
+        print(output)
+        return_codes.append(process.returncode)
+
+    # Объединяем отчеты воркеров в один XML отчет для CI/CD
+    existing_reports = [path for path in worker_reports if os.path.exists(path)]
+    merged_report = merge_junit_reports(
+        existing_reports, f"reports/test_results_{timestamp}.xml")
+    for path in existing_reports:
+        os.remove(path)
+    print(f"🧩 Объединенный XML отчет: {merged_report}")
+
+    existing_latency_reports = [path for path in worker_latency_reports if os.path.exists(path)]
+    merged_latency_report = merge_latency_reports(
+        existing_latency_reports, f"reports/latency_{timestamp}.json")
+    for path in existing_latency_reports:
+        os.remove(path)
+    print(f"⏱ Объединенный отчет о задержках: {merged_latency_report}")
+    if os.path.exists(rate_limit_file):
+        os.remove(rate_limit_file)
+
+    failed = [code for code in return_codes if code not in (0, NO_TESTS_COLLECTED)]
+    returncode = failed[0] if failed else 0
+
+    # Кастомный HTML отчет строится за один проход по объединенному XML
+    html_report = write_report_from_junit(
+        merged_report, f"reports/api_test_report_{timestamp}.html")
+    print(f"HTML отчет сохранен: {html_report}")
+
+    return returncode
+
+
+def run_targets(test_file_path, targets, timestamp, pytest_args=(), via_server=False):
+    """Одновременный прогон набора тестов на нескольких базовых URL.
+
+    На каждую цель запускается отдельный процесс pytest (или запуск на
+    сервере запусков) со своим --api-base-url; по итогам строятся отчеты по
+    каждой цели и сравнение задержек и исходов бок о бок.
+
+    Сбор тестов не общий: каждый процесс импортирует модули и собирает
+    набор заново, что добавляет время сбора на каждую цель. Одна сессия,
+    параметризованная по целям, выполняла бы цели последовательно, а
+    процессы идут одновременно и не делят пул соединений и ограничитель
+    частоты. С --via-server импорты уже прогреты сервером запусков, и
+    повторяется только сбор.
+    """
+    labels = target_labels(targets)
+    runs = []
+    for index, (url, label) in enumerate(zip(targets, labels)):
+        junit_report = f"reports/test_results_{timestamp}_target{index}.xml"
+        latency_report = f"reports/latency_{timestamp}_target{index}.json"
+        target_log = f"reports/target_{timestamp}_{index}.log"
+        cmd = [sys.executable, "-m", "pytest", test_file_path,
+               "-v",
+               f"--api-base-url={url}",
+               f"--junitxml={junit_report}",
+               f"--latency-report={latency_report}",
+               f"--api-rate-limit-file=reports/rate_limit_{timestamp}_target{index}.state",
+               *pytest_args]
+        print(f"📋 Цель {label}: {' '.join(cmd)}")
+        runs.append((index, url, label, junit_report, latency_report, target_log,
+                     start_pytest(cmd, target_log, via_server)))
+
+    return_codes = []
+    compared = []
+    for index, url, label, junit_report, latency_report, target_log, process in runs:
+        output = finish_pytest(process, target_log)
+        print("-" * 50)
+        print(f"Вывод для цели {label}:")
+        print(output)
+        return_codes.append(process.returncode)
+        rate_limit_file = f"reports/rate_limit_{timestamp}_target{index}.state"
+        if os.path.exists(rate_limit_file):
+            os.remove(rate_limit_file)
+        if os.path.exists(junit_report):
+            html_report = write_report_from_junit(
+                junit_report, f"reports/api_test_report_{timestamp}_target{index}.html", url)
+            print(f"HTML отчет для {label}: {html_report}")
+        compared.append((label,
+                         junit_report if os.path.exists(junit_report) else None,
+                         latency_report if os.path.exists(latency_report) else None))
+
+    comparison = compare_targets(compared)
+    print("\n🌍 Сравнение целей:")
+    print(format_comparison(comparison))
+    print(f"Сравнение сохранено: {write_comparison(comparison, f'reports/targets_{timestamp}.json')}")
+
+    failed = [code for code in return_codes if code != 0]
+    return failed[0] if failed else 0
+
+
+def history_target(pytest_args):
+    """Цель прогона по аргументам pytest: сервер-заглушка или --api-base-url"""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--stub-server", action="store_true")
+    parser.add_argument("--api-base-url", default=DEFAULT_BASE_URL)
+    known, _ = parser.parse_known_args(list(pytest_args))
+    return run_target(known.stub_server, known.api_base_url)
+
+
+def save_history(junit_report, history_dir, label=None, target=None):
+    """Дописывание результатов прогона в колоночное хранилище истории"""
+    store = ResultsStore(history_dir)
+    run = store.append_run(cases_from_junit(junit_report), label=label, target=target)
+    print(f"🗄 Прогон #{run} сохранен в истории: {history_dir}")
+    return run
+
+
+def check_regressions(history_dir, mode, recent_runs, baseline_runs, target=None):
+    """Сравнение задержек последних прогонов на той же цели с базовой линией из истории"""
+    store = ResultsStore(history_dir)
+    comparisons = detect_regressions(
+        store, recent_runs=recent_runs, baseline_runs=baseline_runs, target=target)
+    print(f"\n📉 Сравнение задержек с базовой линией на {target} (медианы, мс):")
+    if not any(c.status != "insufficient" for c in comparisons):
+        print(f"Недостаточно истории: нужно больше {recent_runs} прогонов с замерами на этой цели")
+        return 0
+    print(format_comparisons(comparisons))
+
+    regressions = [c for c in comparisons if c.status == "regression"]
+    if not regressions:
+        print("✅ Регрессий задержек не обнаружено")
+        return 0
+    names = ", ".join(f"{c.method} {c.endpoint}" for c in regressions)
+    if mode == "fail":
+        print(f"❌ Регрессия задержек: {names}")
+        return 1
+    print(f"⚠️ Регрессия задержек: {names}")
+    return 0
+
+
+def run_tests_with_reports(workers=1, pytest_args=(), history_dir=None,
+                           regressions="warn", recent_runs=5, baseline_runs=20,
+                           schedule=True, via_server=False, targets=None):
+    """Запуск тестов с генерацией различных отчетов за один прогон"""
 
     # Получить абсолютный путь к файлу
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -20,49 +225,193 @@ def run_tests_with_reports():
     print("🚀 Запуск API тестов с генерацией отчетов...")
     print("=" * 50)
 
-    # Команды для запуска тестов с разными отчетами
-    commands = [
-        #Стандартный HTML отчет pytest
-        [sys.executable, "-m", "pytest", test_file_path,
-         "-v",
-         f"--html=reports/pytest_report_{timestamp}.html",
-         "--self-contained-html"],
-
-        # XML отчет для CI/CD
-        [sys.executable, "-m", "pytest", test_file_path,
-         f"--junitxml=reports/test_results_{timestamp}.xml"],
-
-        # Подробный текстовый отчет в консоли
-        [sys.executable, "-m", "pytest", test_file_path, "-v"],
+    if schedule and history_dir and os.path.isdir(history_dir):
+        # Порядок тестов и распределение по воркерам по истории прогонов
+        pytest_args = [f"--schedule-from={history_dir}", *pytest_args]
 
-        # Запуск функции генерации кастомного отчета
-        [sys.executable, test_file_path]
-    ]
+    if targets:
+        print(f"🌍 Одновременный прогон на {len(targets)} целях")
+        if workers > 1:
+            print("⚠️ --workers не применяется вместе с --targets: на каждую цель один процесс")
+        returncode = run_targets(test_file_path, targets, timestamp, pytest_args, via_server)
+        # Задержки разных развертываний не смешиваются в одной истории
+        history_dir = None
+    elif workers > 1:
+        print(f"⚡ Параллельный запуск на {workers} воркерах")
+        returncode = run_parallel(test_file_path, workers, timestamp, pytest_args, via_server)
+    else:
+        # Один прогон pytest, результаты которого раздаются всем отчетам:
+        # подробный вывод в консоль, стандартный HTML отчет pytest,
+        # XML отчет для CI/CD, кастомный HTML отчет и отчет о задержках
+        cmd = [sys.executable, "-m", "pytest", test_file_path,
+               "-v",
+               f"--html=reports/pytest_report_{timestamp}.html",
+               "--self-contained-html",
+               f"--junitxml=reports/test_results_{timestamp}.xml",
+               f"--custom-html-report=reports/api_test_report_{timestamp}.html",
+               f"--latency-report=reports/latency_{timestamp}.json",
+               *pytest_args]
 
-    for i, cmd in enumerate(commands):
-        print(f"\n📋 Запуск команды {i + 1}: {' '.join(cmd)}")
+        print(f"\n📋 Запуск команды: {' '.join(cmd)}")
         print("-" * 50)
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        # Вывод результатов
-        if result.returncode == 0:
-            print("✅ Тесты завершены успешно")
+        # Вывод не перехватываем, чтобы консольный отчет отображался по ходу прогона
+        if via_server:
+            returncode = run_via_server(cmd[3:])
         else:
-            print("❌ Тесты завершены с ошибками")
+            returncode = subprocess.run(cmd).returncode
 
-        if result.stdout:
-            print("Вывод:")
-            print(result.stdout)
+    # История пополняется из итогового XML отчета, одинаково для обоих режимов
+    junit_report = f"reports/test_results_{timestamp}.xml"
+    if history_dir and os.path.exists(junit_report):
+        # Прогоны на заглушке и на разных API сравниваются только между собой
+        target = history_target(pytest_args)
+        save_history(junit_report, history_dir, label=timestamp, target=target)
+        if regressions != "off":
+            regression_code = check_regressions(
+                history_dir, regressions, recent_runs, baseline_runs, target)
+            returncode = returncode or regression_code
 
-        if result.stderr:
-            print("Ошибки:")
-            print(result.stderr)
+    if returncode == 0:
+        print("✅ Тесты завершены успешно")
+    else:
+        print("❌ Тесты завершены с ошибками")
 
     print("\n" + "=" * 50)
     print("📊 Все отчеты сохранены в папке 'reports/'")
     print(f"🕒 Время запуска: {timestamp}")
 
+    return returncode
+
+
+def run_load(args):
+    """Нагрузочный прогон функциональных сценариев TestPostsAPI"""
+    # requests и сценарии импортируются только в нагрузочном режиме,
+    # чтобы не замедлять запуск обычного прогона
+    from tests.load_scenarios import SCENARIOS
+    from utils.api_client import ApiClient
+    from utils.load_generator import LoadGenerator
+
+    names = args.scenarios.split(",") if args.scenarios else sorted(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ Неизвестные сценарии: {', '.join(unknown)}. Доступны: {', '.join(sorted(SCENARIOS))}")
+        return 2
+
+    os.makedirs("reports", exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    target = f"{args.rps} rps" if args.rps else f"{args.concurrency} потоков"
+    print(f"🔥 Нагрузка на {args.base_url}: {target}, {args.duration} с, разгон {args.ramp_up} с")
+    print(f"📋 Сценарии: {', '.join(names)}")
+    print("=" * 50)
+
+    generator = LoadGenerator(
+        # Каждый поток нагрузки работает со своим ApiClient и пулом соединений
+        client_factory=lambda: ApiClient(base_url=args.base_url, pool_maxsize=1,
+                                         timeout=(args.connect_timeout, args.read_timeout),
+                                         keep_timings=False),
+        scenarios={name: SCENARIOS[name] for name in names},
+        concurrency=args.concurrency,
+        rps=args.rps,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+    )
+    result = generator.run()
+    print(result.format_summary())
+    report_path = result.write_json(f"reports/load_{timestamp}.json")
+    print(f"📊 Отчет о нагрузке: {report_path}")
+
+    if result.error_rate > args.max_error_rate:
+        print(f"❌ Доля ошибок {result.error_rate:.2%} выше допустимой {args.max_error_rate:.2%}")
+        return 1
+    print("✅ Нагрузочный прогон в пределах допустимой доли ошибок")
+    return 0
+
+
+def parse_args():
+    """Разбор аргументов; неизвестные аргументы передаются в pytest как есть"""
+    parser = argparse.ArgumentParser(
+        description="Запуск API тестов с отчетами",
+        epilog="Остальные аргументы (например --stub-server) передаются в pytest")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Число параллельных воркеров (процессов pytest)")
+    parser.add_argument("--targets", default=None,
+                        help="Базовые URL через запятую: прогон на всех одновременно "
+                             "со сравнением задержек и исходов")
+    parser.add_argument("--history-dir", default="reports/history",
+                        help="Каталог хранилища истории прогонов")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Не сохранять результаты прогона в историю")
+    parser.add_argument("--no-schedule", action="store_true",
+                        help="Не менять порядок тестов по истории прогонов")
+    parser.add_argument("--serve", action="store_true",
+                        help="Запустить сервер запусков с прогретыми импортами и ждать запросов")
+    parser.add_argument("--stop-server", action="store_true",
+                        help="Остановить запущенный сервер запусков")
+    parser.add_argument("--via-server", action="store_true",
+                        help="Выполнять pytest на сервере запусков вместо новых процессов")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="Показать время импорта модулей в холодном интерпретаторе")
+    parser.add_argument("--import-budget", type=float, default=500.0,
+                        help="Бюджет времени импорта в мс для --import-profile")
+    parser.add_argument("--regressions", choices=["off", "warn", "fail"], default="warn",
+                        help="Проверка регрессий задержек по истории: выключена, "
+                             "предупреждение или провал прогона")
+    parser.add_argument("--recent-runs", type=int, default=5,
+                        help="Число последних прогонов, сравниваемых с базовой линией")
+    parser.add_argument("--baseline-runs", type=int, default=20,
+                        help="Число предшествующих прогонов в базовой линии")
+
+    load = parser.add_argument_group("нагрузочный режим")
+    load.add_argument("--load", action="store_true",
+                      help="Запустить сценарии TestPostsAPI как нагрузку вместо прогона тестов")
+    load.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                      help="Базовый URL API для нагрузки")
+    load.add_argument("--scenarios", default=None,
+                      help="Сценарии через запятую (по умолчанию все)")
+    load.add_argument("--concurrency", type=int, default=10,
+                      help="Число потоков нагрузки")
+    load.add_argument("--rps", type=float, default=None,
+                      help="Целевая частота запуска сценариев в секунду")
+    load.add_argument("--duration", type=float, default=30.0,
+                      help="Длительность нагрузки в секундах")
+    load.add_argument("--ramp-up", type=float, default=0.0,
+                      help="Время выхода на целевую нагрузку в секундах")
+    load.add_argument("--connect-timeout", type=float, default=5.0,
+                      help="Таймаут установки соединения в секундах")
+    load.add_argument("--read-timeout", type=float, default=30.0,
+                      help="Таймаут ожидания ответа в секундах; зависший запрос "
+                           "не продлевает прогон дольше --duration больше чем на это время")
+    load.add_argument("--max-error-rate", type=float, default=0.0,
+                      help="Допустимая доля ошибок, выше которой прогон считается проваленным")
+    return parser.parse_known_args()
+
 
 if __name__ == "__main__":
-    run_tests_with_reports()
+    args, pytest_args = parse_args()
+    if args.serve:
+        WarmRunnerServer(root=os.path.dirname(os.path.abspath(__file__))).serve_forever()
+        sys.exit(0)
+    if args.stop_server:
+        sys.exit(stop_server())
+    if args.import_profile:
+        total, entries = profile_imports(root=os.path.dirname(os.path.abspath(__file__)))
+        print(format_import_profile(total, entries, args.import_budget))
+        sys.exit(0 if total <= args.import_budget else 1)
+    if args.via_server and not server_available():
+        print("⚠️ Сервер запусков недоступен (--serve), pytest запускается отдельными процессами")
+        args.via_server = False
+    if args.load:
+        sys.exit(run_load(args))
+    sys.exit(run_tests_with_reports(
+        workers=args.workers,
+        pytest_args=pytest_args,
+        history_dir=None if args.no_history else args.history_dir,
+        regressions=args.regressions,
+        recent_runs=args.recent_runs,
+        baseline_runs=args.baseline_runs,
+        schedule=not args.no_schedule,
+        via_server=args.via_server,
+        targets=[url.strip() for url in args.targets.split(",") if url.strip()] if args.targets else None,
+    ))
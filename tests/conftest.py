@@ -1,33 +1,591 @@
+import json
+import os
+
 import pytest
 from utils.api_client import ApiClient
+from utils.async_client import AsyncApiClient
+from utils.cache import ResponseCache
+from utils.capture import ResponseCapture
+from utils.cassette import Cassette
+from utils.datasets import open_dataset
+from utils.html_report import HtmlReportPlugin
+from utils.results_store import ResultsStore, ResultsStorePlugin, run_target
+from utils.retry import CircuitBreaker, RetryPolicy, SharedTokenBucket, TokenBucket
+from utils.stub_server import StubServer
+from tests.payloads import (
+    PATCH_DATA_ALL,
+    PATCH_DATA_EMPTY,
+    PATCH_DATA_MULTIPLE_FIELDS,
+    SAMPLE_POST_DATA,
+)
+from utils.parallel import select_worker_items
+from utils.profiling import ProfilingPlugin
+from utils.scheduler import RunHistory, group_weights, order_items, select_changed
+from utils.schemas import get_schema
 
-@pytest.fixture
-def api_client():
-    return ApiClient()
+connection_stats_key = pytest.StashKey()
+cache_stats_key = pytest.StashKey()
+timings_key = pytest.StashKey()
+retry_stats_key = pytest.StashKey()
+datasets_key = pytest.StashKey()
+capture_key = pytest.StashKey()
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--custom-html-report",
+        action="store",
+        default=None,
+        help="Путь к кастомному HTML отчету, формируемому по ходу прогона",
+    )
+    parser.addoption(
+        "--latency-report",
+        action="store",
+        default=None,
+        help="Путь к JSON файлу с замерами запросов и перцентилями задержек",
+    )
+    parser.addoption(
+        "--results-store",
+        action="store",
+        default=None,
+        help="Каталог колоночного хранилища истории прогонов для дописывания результатов",
+    )
+    parser.addoption(
+        "--api-base-url",
+        action="store",
+        default="https://jsonplaceholder.typicode.com",
+        help="Базовый URL тестируемого API",
+    )
+    parser.addoption(
+        "--stub-server",
+        action="store_true",
+        default=False,
+        help="Запустить локальный сервер /posts и направить тесты на него",
+    )
+    parser.addoption(
+        "--api-pool-connections",
+        action="store",
+        type=int,
+        default=10,
+        help="Число пулов соединений (хостов), кэшируемых ApiClient",
+    )
+    parser.addoption(
+        "--api-pool-maxsize",
+        action="store",
+        type=int,
+        default=10,
+        help="Максимальное число соединений в пуле на один хост",
+    )
+    parser.addoption(
+        "--api-max-retries",
+        action="store",
+        type=int,
+        default=0,
+        help="Число повторных попыток установки соединения",
+    )
+    parser.addoption(
+        "--api-connect-timeout",
+        action="store",
+        type=float,
+        default=5.0,
+        help="Таймаут установки соединения в секундах",
+    )
+    parser.addoption(
+        "--api-read-timeout",
+        action="store",
+        type=float,
+        default=30.0,
+        help="Таймаут ожидания ответа в секундах",
+    )
+    parser.addoption(
+        "--api-retries",
+        action="store",
+        type=int,
+        default=0,
+        help="Число повторов запроса при 429/5xx и сетевых ошибках",
+    )
+    parser.addoption(
+        "--api-backoff-factor",
+        action="store",
+        type=float,
+        default=0.5,
+        help="Базовая задержка экспоненциального backoff в секундах",
+    )
+    parser.addoption(
+        "--api-rate-limit",
+        action="store",
+        type=float,
+        default=None,
+        help="Ограничение частоты запросов, запросов в секунду",
+    )
+    parser.addoption(
+        "--api-rate-limit-file",
+        action="store",
+        default=None,
+        help="Файл состояния ограничителя частоты, общего для параллельных воркеров",
+    )
+    parser.addoption(
+        "--api-circuit-threshold",
+        action="store",
+        type=int,
+        default=0,
+        help="Число отказов подряд, после которого запросы отклоняются (0 — выключено)",
+    )
+    parser.addoption(
+        "--api-circuit-reset",
+        action="store",
+        type=float,
+        default=30.0,
+        help="Время в секундах до пробного запроса после размыкания",
+    )
+    parser.addoption(
+        "--api-no-keep-alive",
+        action="store_true",
+        default=False,
+        help="Отключить keep-alive и закрывать соединение после каждого запроса",
+    )
+    parser.addoption(
+        "--api-concurrency",
+        action="store",
+        type=int,
+        default=10,
+        help="Максимальное число одновременных запросов AsyncApiClient",
+    )
+    parser.addoption(
+        "--api-cache",
+        action="store_true",
+        default=False,
+        help="Кэшировать ответы на GET запросы в рамках прогона",
+    )
+    parser.addoption(
+        "--api-cache-ttl",
+        action="store",
+        type=float,
+        default=60.0,
+        help="Время жизни записи кэша в секундах до ревалидации",
+    )
+    parser.addoption(
+        "--api-cache-size",
+        action="store",
+        type=int,
+        default=128,
+        help="Максимальное число записей в кэше ответов",
+    )
+    parser.addoption(
+        "--cassette",
+        action="store",
+        default=None,
+        help="Файл кассеты (JSON Lines) для записи или воспроизведения HTTP обмена",
+    )
+    parser.addoption(
+        "--record-mode",
+        action="store",
+        choices=["replay", "record"],
+        default="replay",
+        help="replay — отвечать из кассеты без сети, record — записать кассету заново",
+    )
+    parser.addoption(
+        "--capture-responses",
+        action="store",
+        type=int,
+        default=20,
+        help="Сколько последних HTTP обменов хранить для отчета об упавшем тесте (0 — не хранить)",
+    )
+    parser.addoption(
+        "--capture-max-bytes",
+        action="store",
+        type=int,
+        default=16 * 1024,
+        help="Максимальный размер тела запроса или ответа в отчете об упавшем тесте",
+    )
+    parser.addoption(
+        "--capture-compress",
+        action="store_true",
+        default=False,
+        help="Сжимать тела в отчете об упавшем тесте (zlib + base64)",
+    )
+    parser.addoption(
+        "--fuzz-cases",
+        action="store",
+        type=int,
+        default=0,
+        help="Число сгенерированных нагрузок в тесте фаззинга контракта; "
+             "без опции фаззинг выполняется только с --stub-server (100 нагрузок)",
+    )
+    parser.addoption(
+        "--fuzz-strict",
+        action="store_true",
+        default=False,
+        help="Считать нарушением успешный ответ API на некорректную нагрузку",
+    )
+    parser.addoption(
+        "--profile-tests",
+        action="store_true",
+        default=False,
+        help="Замерять CPU, память, аллокации и трафик каждого теста",
+    )
+    parser.addoption(
+        "--profile-report",
+        action="store",
+        default=None,
+        help="Путь к JSON файлу с профилем тестов (с --profile-tests)",
+    )
+    parser.addoption(
+        "--profile-stacks",
+        action="store",
+        default=None,
+        help="Путь к файлу folded stacks самых долгих тестов для flame graph (с --profile-tests)",
+    )
+    parser.addoption(
+        "--profile-stacks-top",
+        action="store",
+        type=int,
+        default=5,
+        help="Для скольких самых долгих тестов сохранять стеки",
+    )
+    parser.addoption(
+        "--profile-overhead",
+        action="store",
+        type=float,
+        default=0.3,
+        help="Доля времени теста вне HTTP, начиная с которой тест отмечается в профиле",
+    )
+    parser.addoption(
+        "--dataset-dir",
+        action="store",
+        default=DATA_DIR,
+        help="Каталог наборов данных (JSONL/CSV) для тестов с маркером dataset",
+    )
+    parser.addoption(
+        "--dataset-limit",
+        action="store",
+        type=int,
+        default=None,
+        help="Максимальное число записей каждого набора данных в прогоне",
+    )
+    parser.addoption(
+        "--schedule-from",
+        action="store",
+        default=None,
+        help="Каталог истории прогонов: недавно падавшие тесты первыми, "
+             "при параллельном запуске — балансировка по длительности",
+    )
+    parser.addoption(
+        "--changed-endpoints",
+        action="store",
+        default=None,
+        help='Запускать только тесты, затрагивающие эндпоинты, например "PATCH /posts/1,/comments"',
+    )
+    parser.addoption(
+        "--worker-index",
+        action="store",
+        type=int,
+        default=0,
+        help="Номер воркера при параллельном запуске (с нуля)",
+    )
+    parser.addoption(
+        "--worker-count",
+        action="store",
+        type=int,
+        default=1,
+        help="Общее число воркеров при параллельном запуске",
+    )
+
+
+@pytest.fixture(scope="session")
+def api_base_url(pytestconfig):
+    """Базовый URL API: локальный сервер-заглушка либо --api-base-url"""
+    if pytestconfig.getoption("--stub-server"):
+        with StubServer() as server:
+            yield server.url
+    else:
+        yield pytestconfig.getoption("--api-base-url")
+
+
+@pytest.fixture(scope="session")
+def api_client(pytestconfig, api_base_url):
+    """Один ApiClient с пулом соединений на весь прогон (на каждый воркер)"""
+    cache = None
+    if pytestconfig.getoption("--api-cache"):
+        cache = ResponseCache(
+            maxsize=pytestconfig.getoption("--api-cache-size"),
+            ttl=pytestconfig.getoption("--api-cache-ttl"),
+        )
+    cassette = None
+    cassette_path = pytestconfig.getoption("--cassette")
+    if cassette_path:
+        cassette = Cassette(cassette_path, mode=pytestconfig.getoption("--record-mode"))
+    retry_policy = None
+    if pytestconfig.getoption("--api-retries"):
+        retry_policy = RetryPolicy(
+            max_retries=pytestconfig.getoption("--api-retries"),
+            backoff_factor=pytestconfig.getoption("--api-backoff-factor"),
+        )
+    rate_limiter = None
+    rate = pytestconfig.getoption("--api-rate-limit")
+    if rate:
+        rate_limit_file = pytestconfig.getoption("--api-rate-limit-file")
+        if rate_limit_file:
+            rate_limiter = SharedTokenBucket(rate, rate_limit_file)
+        else:
+            rate_limiter = TokenBucket(rate)
+    circuit_breaker = None
+    if pytestconfig.getoption("--api-circuit-threshold"):
+        circuit_breaker = CircuitBreaker(
+            failure_threshold=pytestconfig.getoption("--api-circuit-threshold"),
+            reset_timeout=pytestconfig.getoption("--api-circuit-reset"),
+        )
+    capture = None
+    if pytestconfig.getoption("--capture-responses") > 0:
+        capture = ResponseCapture(
+            maxlen=pytestconfig.getoption("--capture-responses"),
+            max_bytes=pytestconfig.getoption("--capture-max-bytes"),
+            compress=pytestconfig.getoption("--capture-compress"),
+        )
+        pytestconfig.stash[capture_key] = capture
+    client = ApiClient(
+        base_url=api_base_url,
+        pool_connections=pytestconfig.getoption("--api-pool-connections"),
+        # Пул вмещает все одновременные запросы AsyncApiClient, иначе лишние
+        # соединения открываются и закрываются на каждый запрос
+        pool_maxsize=max(pytestconfig.getoption("--api-pool-maxsize"),
+                         pytestconfig.getoption("--api-concurrency")),
+        max_retries=pytestconfig.getoption("--api-max-retries"),
+        keep_alive=not pytestconfig.getoption("--api-no-keep-alive"),
+        cache=cache,
+        cassette=cassette,
+        timeout=(pytestconfig.getoption("--api-connect-timeout"),
+                 pytestconfig.getoption("--api-read-timeout")),
+        retry_policy=retry_policy,
+        rate_limiter=rate_limiter,
+        circuit_breaker=circuit_breaker,
+        capture=capture,
+    )
+    pytestconfig.stash[timings_key] = client.timings
+    pytestconfig.stash[retry_stats_key] = client.retry_stats
+    yield client
+    # Статистику соединений и кэша сохраняем для итоговой сводки прогона
+    pytestconfig.stash[connection_stats_key] = client.connection_stats()
+    if cache is not None:
+        pytestconfig.stash[cache_stats_key] = cache.stats()
+    client.close()
+
+
+@pytest.fixture(autouse=True)
+def api_request_timings(request, api_client):
+    """Пометка замеров запросов текущим тестом и сохранение их в отчете"""
+    api_client.timings.context = request.node.nodeid
+    yield
+    api_client.timings.context = None
+    records = [timing.to_dict() for timing in api_client.timings.records_for(request.node.nodeid)]
+    # Свойство попадает в JUnit XML и в отчеты, собираемые из результатов pytest
+    request.node.user_properties.append(("api_requests", json.dumps(records)))
+
+
+@pytest.fixture(scope="session")
+def async_api_client(api_client, pytestconfig):
+    """Асинхронный клиент поверх общего пула соединений api_client"""
+    client = AsyncApiClient(
+        client=api_client,
+        concurrency=pytestconfig.getoption("--api-concurrency"),
+    )
+    yield client
+    client.close()
 
 @pytest.fixture
 def sample_post_data():
-    return {
-        "title": "Test Post",
-        "body": "This is a test post body",
-        "userId": 1
-    }
+    return dict(SAMPLE_POST_DATA)
 
 @pytest.fixture
 def patch_data_all():
-    return {
-        "title": "Patched Title",
-        "body": "Patched body content",
-        "userId": 1,
-    }
+    return dict(PATCH_DATA_ALL)
 
 @pytest.fixture
 def patch_data_multiple_fields():
-    return {
-        "title": "New Updated Title",
-        "body": "New updated body content"
-    }
+    return dict(PATCH_DATA_MULTIPLE_FIELDS)
 
 @pytest.fixture
 def patch_data_empty():
-    return {}
+    return dict(PATCH_DATA_EMPTY)
+
+
+def _dataset(config, name, schema=None):
+    """Набор данных, открытый один раз на прогон; индексируется через mmap"""
+    datasets = config.stash.setdefault(datasets_key, {})
+    path = os.path.join(config.getoption("--dataset-dir"), name)
+    if path not in datasets:
+        types = None
+        if schema is not None:
+            # Значения CSV приводятся к типам полей схемы
+            types = {field: field_type for field, field_type in get_schema(schema).fields.items()
+                     if isinstance(field_type, type)}
+        datasets[path] = open_dataset(path, types)
+    return datasets[path]
+
+
+def pytest_generate_tests(metafunc):
+    """Параметризация тестов с маркером dataset номерами записей набора.
+
+    При сборе тестов читаются только смещения строк файла, сами записи
+    загружаются фикстурой dataset_case непосредственно перед тестом.
+    """
+    marker = metafunc.definition.get_closest_marker("dataset")
+    if marker is None or "dataset_case" not in metafunc.fixturenames:
+        return
+    dataset = _dataset(metafunc.config, *marker.args, **marker.kwargs)
+    count = len(dataset)
+    limit = metafunc.config.getoption("--dataset-limit")
+    if limit is not None:
+        count = min(count, limit)
+    name = os.path.splitext(os.path.basename(dataset.path))[0]
+    metafunc.parametrize("dataset_case", range(count), indirect=True,
+                         ids=[f"{name}-{index}" for index in range(count)])
+
+
+@pytest.fixture
+def dataset_case(request):
+    """Запись набора данных из маркера dataset, загружаемая по номеру"""
+    marker = request.node.get_closest_marker("dataset")
+    return _dataset(request.config, *marker.args, **marker.kwargs)[request.param]
+
+
+def pytest_configure(config):
+    report_path = config.getoption("--custom-html-report")
+    if report_path:
+        if config.getoption("--stub-server"):
+            base_url = "локальный сервер (--stub-server)"
+        else:
+            base_url = config.getoption("--api-base-url")
+        config.pluginmanager.register(
+            HtmlReportPlugin(report_path, base_url), "api_html_report")
+
+    if config.getoption("--profile-tests"):
+        config.pluginmanager.register(ProfilingPlugin(
+            report_path=config.getoption("--profile-report"),
+            stacks_path=config.getoption("--profile-stacks"),
+            stacks_top=config.getoption("--profile-stacks-top"),
+            overhead_threshold=config.getoption("--profile-overhead"),
+        ), "api_test_profiling")
+
+    store_directory = config.getoption("--results-store")
+    if store_directory:
+        config.pluginmanager.register(
+            ResultsStorePlugin(store_directory, target=run_target(
+                config.getoption("--stub-server"), config.getoption("--api-base-url"))),
+            "api_results_store")
+
+
+def pytest_unconfigure(config):
+    for dataset in config.stash.get(datasets_key, {}).values():
+        dataset.close()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Вложение последних HTTP обменов теста в отчет о его падении"""
+    outcome = yield
+    report = outcome.get_result()
+    capture = item.config.stash.get(capture_key, None)
+    if capture is None or not report.failed or report.when == "teardown":
+        return
+    exchanges = capture.for_test(item.nodeid)
+    if not exchanges:
+        return
+    text = capture.format(exchanges)
+    report.sections.append(("API responses", text))
+    # Свойство попадает в JUnit XML и в кастомный HTML отчет
+    item.user_properties.append(("api_responses", text))
+
+
+def pytest_itemcollected(item):
+    """Описание теста (первая строка docstring) для отчетов"""
+    function = getattr(item, "function", None)
+    doc = function.__doc__ if function is not None else None
+    if doc:
+        item.user_properties.append(("description", doc.strip().splitlines()[0]))
+
+
+def pytest_collection_modifyitems(config, items):
+    """Отбор тестов по измененным эндпоинтам и для текущего воркера,
+    порядок выполнения по истории прогонов"""
+    history = None
+    history_dir = config.getoption("--schedule-from")
+    if history_dir and os.path.isdir(history_dir):
+        history = RunHistory.from_store(ResultsStore(history_dir))
+    deselected = []
+
+    changed = config.getoption("--changed-endpoints")
+    if changed:
+        if history is None:
+            raise pytest.UsageError("--changed-endpoints требует истории прогонов (--schedule-from)")
+        items[:], skipped = select_changed(items, history, changed.split(","))
+        deselected += skipped
+
+    worker_count = config.getoption("--worker-count")
+    if worker_count > 1:
+        # Все воркеры читают одну историю и получают одинаковые веса групп
+        weights = group_weights(items, history) if history is not None else None
+        items[:], skipped = select_worker_items(
+            items, config.getoption("--worker-index"), worker_count, weights)
+        deselected += skipped
+
+    if history is not None:
+        items[:] = order_items(items, history, longest_first=worker_count > 1)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Запись отчета о задержках по итогам прогона"""
+    timings = session.config.stash.get(timings_key, None)
+    latency_report = session.config.getoption("--latency-report")
+    if latency_report and timings is not None:
+        timings.write_json(latency_report)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Вывод статистики переиспользования соединений и кэша ApiClient"""
+    stats = config.stash.get(connection_stats_key, None)
+    if stats:
+        terminalreporter.section("API connection reuse")
+        for host, host_stats in sorted(stats.items()):
+            reused = host_stats['reused']
+            terminalreporter.write_line(
+                f"{host}: соединений (рукопожатий) {host_stats['connections']}, "
+                f"запросов {host_stats['requests']}, "
+                f"по открытым соединениям {'не отслеживается' if reused is None else reused}"
+            )
+
+    timings = config.stash.get(timings_key, None)
+    if timings is not None and timings.records:
+        terminalreporter.section("API latency (ms)")
+        terminalreporter.write_line(
+            f"{'endpoint':<40} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for (method, endpoint), stats in timings.summary().items():
+            terminalreporter.write_line(
+                f"{method + ' ' + endpoint:<40} {stats['count']:>6} "
+                f"{stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f} "
+                f"{stats['p99'] * 1000:>9.1f} {stats['max'] * 1000:>9.1f}")
+
+    retry_stats = config.stash.get(retry_stats_key, None)
+    if retry_stats is not None:
+        retry_stats = retry_stats.snapshot()
+        if any(retry_stats.values()):
+            terminalreporter.section("API retries")
+            terminalreporter.write_line(
+                f"повторов {retry_stats['retries']}, "
+                f"в backoff {retry_stats['backoff_seconds']:.2f} s, "
+                f"в ожидании ограничителя частоты {retry_stats['rate_limit_seconds']:.2f} s, "
+                f"отклонено размыкателем {retry_stats['circuit_rejections']}"
+            )
+
+    cache_stats = config.stash.get(cache_stats_key, None)
+    if cache_stats:
+        terminalreporter.section("API response cache")
+        terminalreporter.write_line(
+            f"попаданий {cache_stats['hits']}, промахов {cache_stats['misses']}, "
+            f"ревалидаций (304) {cache_stats['revalidated']}, "
+            f"записей {cache_stats['entries']}"
+        )
@@ -0,0 +1,28 @@
+"""Сценарии нагрузки, построенные на функциональных тестах TestPostsAPI"""
+
+from tests.payloads import PATCH_DATA_ALL, PATCH_DATA_MULTIPLE_FIELDS, SAMPLE_POST_DATA
+from tests.test_posts_api import TestPostsAPI
+
+
+def _scenario(test_name, *payloads):
+    """Сценарий, выполняющий тест с проверками на переданном ApiClient"""
+    test_method = getattr(TestPostsAPI, test_name)
+
+    def run(client):
+        # Каждому вызову — свежие копии данных, как у фикстур pytest
+        test_method(TestPostsAPI(), client, *(dict(payload) for payload in payloads))
+
+    run.__name__ = test_name
+    return run
+
+
+SCENARIOS = {
+    "get_all": _scenario("test_get_all_posts"),
+    "get_single": _scenario("test_get_single_post"),
+    "filter_by_user": _scenario("test_filter_posts_by_user_id"),
+    "create": _scenario("test_create_post", SAMPLE_POST_DATA),
+    "update": _scenario("test_update_post"),
+    "patch": _scenario("test_partial_update_post", PATCH_DATA_ALL),
+    "patch_multiple": _scenario("test_partial_update_with_multiple_fields", PATCH_DATA_MULTIPLE_FIELDS),
+    "not_found": _scenario("test_nonexistent_resource"),
+}
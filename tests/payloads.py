@@ -0,0 +1,20 @@
+"""Тестовые данные для запросов к API постов"""
+
+SAMPLE_POST_DATA = {
+    "title": "Test Post",
+    "body": "This is a test post body",
+    "userId": 1
+}
+
+PATCH_DATA_ALL = {
+    "title": "Patched Title",
+    "body": "Patched body content",
+    "userId": 1,
+}
+
+PATCH_DATA_MULTIPLE_FIELDS = {
+    "title": "New Updated Title",
+    "body": "New updated body content"
+}
+
+PATCH_DATA_EMPTY = {}
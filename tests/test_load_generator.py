@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from utils.load_generator import LoadGenerator
+
+
+class _FakeClient:
+    def close(self):
+        pass
+
+
+class TestLoadGenerator:
+    """Тесты расписания запуска сценариев генератора нагрузки"""
+
+    def _generator(self, started_at, **kwargs):
+        lock = threading.Lock()
+
+        def scenario(client):
+            with lock:
+                started_at.append(time.perf_counter())
+
+        return LoadGenerator(lambda: _FakeClient(), {"noop": scenario}, **kwargs)
+
+    def test_slot_times_follow_linear_ramp(self):
+        """Слоты разгона — по накопленному числу запусков, после — с шагом 1/rps"""
+        generator = self._generator([], rps=10, ramp_up=4)
+        # За разгон запускается rps * ramp_up / 2 = 20 сценариев
+        assert generator._slot_time(0) == 0
+        assert generator._slot_time(5) == pytest.approx(2.0)
+        assert generator._slot_time(20) == pytest.approx(4.0)
+        assert generator._slot_time(30) == pytest.approx(5.0)
+
+    def test_rps_with_ramp_up_starts_expected_scenarios(self):
+        """Число запущенных сценариев соответствует площади под графиком частоты"""
+        started_at = []
+        generator = self._generator(started_at, concurrency=10, rps=100, duration=1.5, ramp_up=1.0)
+        run_started = time.perf_counter()
+        result = generator.run()
+
+        # 50 сценариев за разгон и 50 за оставшиеся 0.5 с на полной частоте
+        assert result.total == len(started_at)
+        assert 90 <= result.total <= 101, f"Запущено {result.total} сценариев, ожидалось около 100"
+        early = [moment for moment in started_at if moment - run_started < 0.5]
+        # За первую половину разгона — около четверти его запусков
+        assert 10 <= len(early) <= 16, f"За первые 0.5 с запущено {len(early)} сценариев"
+
+    def test_rps_without_ramp_up(self):
+        """Без разгона сценарии запускаются с постоянной частотой"""
+        started_at = []
+        result = self._generator(started_at, concurrency=4, rps=50, duration=1.0).run()
+        assert 45 <= result.total <= 51, f"Запущено {result.total} сценариев, ожидалось около 50"
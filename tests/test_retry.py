@@ -0,0 +1,189 @@
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from utils.api_client import ApiClient
+from utils import retry
+from utils.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, SharedTokenBucket, TokenBucket
+from utils.stub_server import StubServer
+
+requires_fcntl = pytest.mark.skipif(retry.fcntl is None, reason="общий лимит требует fcntl")
+
+
+def _response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return response
+
+
+class TestRetryPolicy:
+    """Тесты выбора повторяемых запросов и задержек между ними"""
+
+    def test_exponential_backoff_without_jitter(self):
+        """Задержка растет вдвое с каждой попыткой и ограничена max_backoff"""
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=3.0, jitter=False)
+        assert [policy.backoff(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3.0]
+
+    def test_jitter_stays_within_backoff(self):
+        """Полный джиттер выбирает задержку от нуля до экспоненциальной"""
+        policy = RetryPolicy(backoff_factor=1.0)
+        assert all(0 <= policy.backoff(2) <= 4.0 for _ in range(100))
+
+    def test_retry_after_seconds(self):
+        """Retry-After в секундах имеет приоритет над вычисленной задержкой"""
+        policy = RetryPolicy(backoff_factor=0.1, max_backoff=30.0, jitter=False)
+        assert policy.backoff(0, _response(429, {"Retry-After": "7"})) == 7.0
+        # Задержка из заголовка тоже ограничена max_backoff
+        assert policy.backoff(0, _response(503, {"Retry-After": "120"})) == 30.0
+
+    def test_retry_after_http_date(self):
+        """Retry-After в виде HTTP даты пересчитывается в секунды от текущего момента"""
+        policy = RetryPolicy(jitter=False)
+        delay = policy.backoff(0, _response(503, {"Retry-After": formatdate(time.time() + 10, usegmt=True)}))
+        assert 8.0 <= delay <= 10.0
+        past = policy.backoff(0, _response(503, {"Retry-After": formatdate(time.time() - 60, usegmt=True)}))
+        assert past == 0.0
+
+    def test_invalid_retry_after_falls_back_to_backoff(self):
+        policy = RetryPolicy(backoff_factor=0.5, jitter=False)
+        assert policy.backoff(1, _response(503, {"Retry-After": "скоро"})) == 1.0
+
+    @pytest.mark.parametrize("method, status, expected", [
+        ("GET", 500, True),
+        ("PUT", 502, True),
+        ("DELETE", 504, True),
+        ("POST", 500, False),
+        ("PATCH", 502, False),
+        ("POST", 429, True),
+        ("PATCH", 503, False),
+        ("POST", 503, False),
+        ("GET", 503, True),
+        ("GET", 404, False),
+        ("GET", 200, False),
+    ])
+    def test_method_gating_for_responses(self, method, status, expected):
+        """Неидемпотентные методы повторяются только при 429"""
+        assert RetryPolicy().can_retry(method, 0, _response(status)) is expected
+
+    def test_method_gating_for_network_errors(self):
+        """Сетевая ошибка повторяется только для идемпотентных методов"""
+        policy = RetryPolicy()
+        assert policy.can_retry("GET", 0)
+        assert policy.can_retry("DELETE", 0)
+        assert not policy.can_retry("POST", 0)
+        assert not policy.can_retry("PATCH", 0)
+
+    def test_max_retries(self):
+        policy = RetryPolicy(max_retries=2)
+        assert policy.can_retry("GET", 1, _response(503))
+        assert not policy.can_retry("GET", 2, _response(503))
+
+
+class TestCircuitBreaker:
+    """Тесты переходов размыкателя цепи"""
+
+    def test_opens_after_threshold(self):
+        """Размыкатель открывается после failure_threshold отказов подряд"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_half_open_probe_success_closes(self):
+        """После reset_timeout пропускается один пробный запрос; успех замыкает цепь"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert breaker.state == "open"
+        time.sleep(0.06)
+        assert breaker.state == "half-open"
+        breaker.before_request()
+        # Пока пробный запрос не завершен, остальные отклоняются
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        breaker.before_request()
+
+    def test_half_open_probe_failure_reopens(self):
+        """Отказ пробного запроса снова открывает размыкатель на reset_timeout"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.06)
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+        time.sleep(0.06)
+        breaker.before_request()
+
+    def test_probe_released_after_unexpected_error(self, monkeypatch):
+        """Ошибка пробного запроса любого типа не оставляет размыкатель в полуоткрытом состоянии"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        with StubServer() as server:
+            client = ApiClient(base_url=server.url, circuit_breaker=breaker)
+            breaker.record_failure()
+            time.sleep(0.06)
+
+            def redirect_loop(*args, **kwargs):
+                raise requests.TooManyRedirects("Exceeded 30 redirects.")
+
+            monkeypatch.setattr(client.session, "request", redirect_loop)
+            with pytest.raises(requests.TooManyRedirects):
+                client.get("/posts/1")
+            assert breaker.state == "open"
+            monkeypatch.undo()
+
+            time.sleep(0.06)
+            assert breaker.state == "half-open"
+            response = client.get("/posts/1")
+            assert response.status_code == 200
+            assert breaker.state == "closed"
+            client.close()
+
+
+class TestTokenBucket:
+    """Тесты ограничителя частоты запросов"""
+
+    def test_burst_then_wait(self):
+        """Запас capacity выдается сразу, следующий токен — через 1/rate"""
+        bucket = TokenBucket(rate=20, capacity=2)
+        assert bucket.acquire() == 0.0
+        assert bucket.acquire() == 0.0
+        started = time.perf_counter()
+        waited = bucket.acquire()
+        assert 0.03 <= waited <= 0.06
+        assert time.perf_counter() - started >= 0.03
+
+    @requires_fcntl
+    def test_shared_bucket_is_common_for_instances(self, tmp_path):
+        """Экземпляры SharedTokenBucket с одним файлом делят общий запас токенов"""
+        path = str(tmp_path / "rate-limit.state")
+        first = SharedTokenBucket(rate=1, path=path, capacity=2)
+        second = SharedTokenBucket(rate=1, path=path, capacity=2)
+        assert first._take() == 0.0
+        assert second._take() == 0.0
+        # Запас исчерпан обоими экземплярами: третьему запросу нужно ждать
+        assert first._take() > 0.5
+        assert second._take() > 0.5
+
+    @requires_fcntl
+    def test_shared_bucket_refills_from_file_state(self, tmp_path):
+        """Пополнение считается от времени, сохраненного в файле другим экземпляром"""
+        path = str(tmp_path / "rate-limit.state")
+        first = SharedTokenBucket(rate=50, path=path, capacity=1)
+        assert first.acquire() == 0.0
+        waited = SharedTokenBucket(rate=50, path=path, capacity=1).acquire()
+        assert 0.01 <= waited <= 0.03
@@ -1,32 +1,334 @@
-import requests
 import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import prepend_scheme_if_needed, select_proxy
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util import parse_url
+
+from utils.cassette import CassetteAdapter
+from utils.retry import CircuitOpenError, RetryStats
+from utils.timings import TimedConnectionMixin, TimingCollector, endpoint_label
+
+
+class ConnectionStats:
+    """Потокобезопасный учет соединений и запросов по хостам"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        return self._hosts.setdefault(host, {"connections": 0, "requests": 0})
+
+    def connection_opened(self, host):
+        with self._lock:
+            self._host(host)["connections"] += 1
+
+    def request_sent(self, host):
+        with self._lock:
+            self._host(host)["requests"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = {}
+            for host, counters in self._hosts.items():
+                stats[host] = dict(counters)
+                # Без учтенных соединений (например, через SOCKS прокси)
+                # о переиспользовании судить нельзя
+                stats[host]["reused"] = max(
+                    counters["requests"] - counters["connections"], 0) if counters["connections"] else None
+            return stats
+
+
+def _tracked_pool_class(pool_cls, scheme, stats):
+    """Подкласс пула urllib3, чьи соединения сообщают об открытии сокета
+    и замеряют фазы запроса"""
+
+    class TrackedConnection(TimedConnectionMixin, pool_cls.ConnectionCls):
+        def _new_conn(self):
+            sock = super()._new_conn()
+            # Через прокси сокет открывается к прокси: host и port — его,
+            # а для туннеля HTTPS схема берется из адреса прокси
+            proxy = getattr(self, "proxy", None)
+            stats.connection_opened(f"{proxy.scheme if proxy else scheme}://{self.host}:{self.port}")
+            return sock
+
+    return type(f"Tracked{pool_cls.__name__}", (pool_cls,),
+                {"ConnectionCls": TrackedConnection})
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter с настраиваемым TCP keep-alive и учетом соединений"""
+
+    def __init__(self, keep_alive=True, **kwargs):
+        self.keep_alive = keep_alive
+        self.stats = ConnectionStats()
+        super().__init__(**kwargs)
+
+    def _socket_options(self):
+        socket_options = list(HTTPConnection.default_socket_options)
+        socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        return socket_options
+
+    def _track_pools(self, manager):
+        manager.pool_classes_by_scheme = {
+            "http": _tracked_pool_class(HTTPConnectionPool, "http", self.stats),
+            "https": _tracked_pool_class(HTTPSConnectionPool, "https", self.stats),
+        }
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.keep_alive:
+            kwargs["socket_options"] = self._socket_options()
+        super().init_poolmanager(*args, **kwargs)
+        self._track_pools(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        """ProxyManager (HTTP_PROXY, HTTPS_PROXY) с теми же keep-alive и учетом
+        соединений; у SOCKS прокси свои классы пулов, они не заменяются"""
+        if proxy in self.proxy_manager:
+            return self.proxy_manager[proxy]
+        if self.keep_alive:
+            proxy_kwargs.setdefault("socket_options", self._socket_options())
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):
+            self._track_pools(manager)
+        return manager
+
+    def send(self, request, **kwargs):
+        # Через прокси соединения открываются к прокси, запросы учитываются там же
+        proxy = select_proxy(request.url, kwargs.get("proxies"))
+        url = parse_url(prepend_scheme_if_needed(proxy, "http") if proxy else request.url)
+        port = url.port or (443 if url.scheme == "https" else 80)
+        self.stats.request_sent(f"{url.scheme}://{url.host}:{port}")
+        return super().send(request, **kwargs)
+
+
+class BatchResult:
+    """Результат одного запроса пакета: ответ либо ошибка транспорта.
+
+    timings — замеры всех попыток запроса (с учетом повторов), elapsed —
+    полное время выполнения элемента пакета в секундах.
+    """
+
+    def __init__(self, method, endpoint, response=None, error=None, timings=(), elapsed=0.0):
+        self.method = method
+        self.endpoint = endpoint
+        self.response = response
+        self.error = error
+        self.timings = list(timings)
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None and self.response is not None and self.response.ok
 
 
 class ApiClient:
-    def __init__(self, base_url="https://jsonplaceholder.typicode.com"):
+    def __init__(self, base_url="https://jsonplaceholder.typicode.com",
+                 pool_connections=10, pool_maxsize=10, max_retries=0,
+                 keep_alive=True, cache=None, cassette=None, timeout=None,
+                 retry_policy=None, rate_limiter=None, circuit_breaker=None,
+                 capture=None, keep_timings=True):
         self.base_url = base_url
+        self.pool_maxsize = pool_maxsize
+        # Таймаут запроса: число или пара (connect, read) в секундах
+        self.timeout = timeout
+        # Необязательные RetryPolicy, TokenBucket и CircuitBreaker из utils.retry
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.retry_stats = RetryStats()
+        # Необязательный ResponseCapture с последними ответами для диагностики
+        self.capture = capture
+        # Замеры запросов текущего элемента пакета в рабочем потоке batch()
+        self._batch_local = threading.local()
+        # Необязательный ResponseCache для повторных GET запросов
+        self.cache = cache
+        # Замеры фаз каждого запроса, помеченные текущим тестом; при
+        # keep_timings=False (долгая нагрузка) они не накапливаются
+        self.timings = TimingCollector(keep=keep_timings)
         self.session = requests.Session()
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        if not keep_alive:
+            # Без keep-alive сервер закрывает соединение после каждого ответа
+            self.session.headers['Connection'] = 'close'
+
+        # Один адаптер на обе схемы, чтобы статистика собиралась в одном месте
+        adapter = PooledHTTPAdapter(
+            keep_alive=keep_alive,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        if cassette is not None:
+            # Запись/воспроизведение кассеты поверх настоящего транспорта
+            adapter = CassetteAdapter(cassette, adapter)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _request(self, method, endpoint, **kwargs):
+        url = f"{self.base_url}{endpoint}"
+        label = endpoint_label(endpoint, kwargs.get("params"))
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        backoff = 0.0
+        while True:
+            if self.circuit_breaker is not None:
+                try:
+                    self.circuit_breaker.before_request()
+                except CircuitOpenError:
+                    self.retry_stats.add(circuit_rejections=1)
+                    raise
+            wait = backoff
+            if self.rate_limiter is not None:
+                limited = self.rate_limiter.acquire()
+                self.retry_stats.add(rate_limit_seconds=limited)
+                wait += limited
+
+            timing = self.timings.start(method, label)
+            timing.attempt = attempt
+            timing.wait = wait
+            batch_timings = getattr(self._batch_local, "timings", None)
+            if batch_timings is not None:
+                batch_timings.append(timing)
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record_outcome(failed=True)
+                if self.retry_policy is None or not self.retry_policy.can_retry(method, attempt):
+                    raise
+            except Exception:
+                # Прочие ошибки (TooManyRedirects, ChunkedEncodingError, промах
+                # кассеты) не повторяются, но тоже завершают пробный запрос
+                # размыкателя, иначе он остался бы полуоткрытым навсегда
+                self._record_outcome(failed=True)
+                raise
+            finally:
+                self.timings.finish(timing, response)
 
-    def get(self, endpoint, params=None):
-        response = self.session.get(f"{self.base_url}{endpoint}", params=params)
+            if response is not None:
+                if self.capture is not None:
+                    self.capture.add(self.timings.context, method, response)
+                self._record_outcome(failed=response.status_code >= 500 or response.status_code == 429)
+                if self.retry_policy is None or not self.retry_policy.can_retry(method, attempt, response):
+                    break
+                # Тело ответа не нужно, соединение возвращается в пул
+                response.close()
+
+            backoff = self.retry_policy.backoff(attempt, response)
+            self.retry_stats.add(retries=1, backoff_seconds=backoff)
+            time.sleep(backoff)
+            attempt += 1
+
+        if self.cache is not None and method != "GET":
+            self.cache.invalidate(url)
         return response
 
-    def post(self, endpoint, data=None):
-        response = self.session.post(f"{self.base_url}{endpoint}", json=data)
+    def _record_outcome(self, failed):
+        if self.circuit_breaker is None:
+            return
+        if failed:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    def get(self, endpoint, params=None, stream=False):
+        """GET запрос; при stream=True тело не загружается целиком.
+
+        Потоковый ответ читается через utils.streaming.iter_json_items и
+        в кэш не попадает.
+        """
+        if self.cache is None or stream:
+            return self._request("GET", endpoint, params=params, stream=stream)
+
+        key = self.cache.key(f"{self.base_url}{endpoint}", params)
+        entry, fresh = self.cache.lookup(key)
+        if fresh:
+            return entry.response
+
+        headers = entry.validators() if entry is not None else None
+        response = self._request("GET", endpoint, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidate(key, entry)
+            return entry.response
+        self.cache.store(key, response)
         return response
 
+    def post(self, endpoint, data=None):
+        return self._request("POST", endpoint, json=data)
+
     def put(self, endpoint, data=None):
-        response = self.session.put(f"{self.base_url}{endpoint}", json=data)
-        return response
+        return self._request("PUT", endpoint, json=data)
 
     def delete(self, endpoint):
-        response = self.session.delete(f"{self.base_url}{endpoint}")
-        return response
+        return self._request("DELETE", endpoint)
 
     def patch(self, endpoint, data=None):
-        response = self.session.patch(f"{self.base_url}{endpoint}", json=data)
-        return response
+        return self._request("PATCH", endpoint, json=data)
+
+    def _batch_item(self, item):
+        method, endpoint, payload = (tuple(item) + (None,))[:3]
+        method = method.upper()
+        self._batch_local.timings = []
+        started = time.perf_counter()
+        response = error = None
+        try:
+            if method == "GET":
+                response = self.get(endpoint, params=payload)
+            elif method == "DELETE":
+                response = self.delete(endpoint)
+            else:
+                response = self._request(method, endpoint, json=payload)
+        except requests.RequestException as exc:
+            error = exc
+        finally:
+            timings = self._batch_local.timings
+            self._batch_local.timings = None
+        return BatchResult(method, endpoint, response, error, timings,
+                           time.perf_counter() - started)
+
+    def batch(self, items, concurrency=None):
+        """Выполнение пакета запросов (метод, эндпоинт, данные) по общему пулу.
+
+        Для GET данные передаются как query-параметры, для DELETE не
+        используются. Запросы выполняются одновременно, но не больше
+        concurrency (по умолчанию — размер пула соединений), поэтому каждый
+        поток получает свое keep-alive соединение. Результаты BatchResult
+        возвращаются в порядке items; ошибки транспорта не прерывают пакет,
+        а сохраняются в результате элемента.
+        """
+        items = list(items)
+        if not items:
+            return []
+        workers = min(concurrency or self.pool_maxsize, len(items))
+        if workers == 1:
+            return [self._batch_item(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-batch") as executor:
+            return list(executor.map(self._batch_item, items))
+
+    def connection_stats(self):
+        """Статистика переиспользования соединений по хостам.
+
+        Для каждого хоста возвращает число открытых соединений (для HTTPS это
+        число TLS-рукопожатий), число запросов и сколько из них ушло
+        по уже открытым соединениям.
+        """
+        stats = {}
+        for adapter in set(self.session.adapters.values()):
+            adapter = getattr(adapter, "wrapped", adapter)
+            if isinstance(adapter, PooledHTTPAdapter):
+                stats.update(adapter.stats.snapshot())
+        return stats
+
+    def close(self):
+        self.session.close()
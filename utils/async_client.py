@@ -0,0 +1,69 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import ApiClient
+
+
+class AsyncApiClient:
+    """Асинхронная обертка над ApiClient для параллельной отправки запросов.
+
+    Запросы выполняются в собственном пуле из concurrency потоков поверх
+    одного пула соединений ApiClient: пул потоков цикла событий по
+    умолчанию (min(32, CPU + 4)) ограничил бы параллелизм сильнее.
+    """
+
+    def __init__(self, base_url="https://jsonplaceholder.typicode.com",
+                 concurrency=10, client=None, **client_kwargs):
+        self.concurrency = concurrency
+        self._owns_client = client is None
+        if client is None:
+            # Пул должен вмещать все одновременные запросы, иначе лишние
+            # соединения будут открываться и закрываться на каждый запрос
+            client_kwargs.setdefault("pool_maxsize", concurrency)
+            client = ApiClient(base_url=base_url, **client_kwargs)
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="async-api")
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _get_semaphore(self):
+        # Семафор создается лениво внутри работающего цикла событий,
+        # так как каждый asyncio.run() запускает новый цикл
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call(self, method, *args):
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(getattr(self.client, method), *args))
+
+    async def get(self, endpoint, params=None):
+        return await self._call("get", endpoint, params)
+
+    async def post(self, endpoint, data=None):
+        return await self._call("post", endpoint, data)
+
+    async def put(self, endpoint, data=None):
+        return await self._call("put", endpoint, data)
+
+    async def delete(self, endpoint):
+        return await self._call("delete", endpoint)
+
+    async def patch(self, endpoint, data=None):
+        return await self._call("patch", endpoint, data)
+
+    async def get_many(self, endpoints, params=None):
+        """Параллельный GET по списку эндпоинтов, ответы в исходном порядке"""
+        return await asyncio.gather(
+            *(self.get(endpoint, params) for endpoint in endpoints))
+
+    def close(self):
+        """Остановка пула потоков; переданный снаружи ApiClient закрывает его владелец"""
+        self._executor.shutdown(wait=True)
+        if self._owns_client:
+            self.client.close()
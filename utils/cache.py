@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+
+
+class CacheEntry:
+    def __init__(self, response, expires_at):
+        self.response = response
+        self.expires_at = expires_at
+        self.stale = False
+
+    @property
+    def etag(self):
+        return self.response.headers.get("ETag")
+
+    @property
+    def last_modified(self):
+        return self.response.headers.get("Last-Modified")
+
+    def is_fresh(self, now):
+        return not self.stale and now < self.expires_at
+
+    def validators(self):
+        """Заголовки условного запроса для ревалидации записи"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """LRU кэш ответов на идемпотентные GET запросы.
+
+    Свежие записи (моложе ttl секунд) отдаются без обращения к серверу.
+    Устаревшие записи с ETag/Last-Modified ревалидируются условным запросом:
+    ответ 304 продлевает запись без повторной передачи тела. Запись через
+    тот же клиент (POST/PUT/PATCH/DELETE) помечает кэш пути и родительской
+    коллекции устаревшим.
+    """
+
+    def __init__(self, maxsize=128, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    @staticmethod
+    def key(url, params=None):
+        """Канонический URL запроса с учетом query-параметров"""
+        return requests.Request("GET", url, params=params).prepare().url
+
+    def lookup(self, key):
+        """Запись кэша и признак того, что ее можно отдать без запроса"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if entry.is_fresh(self.clock()):
+                self.hits += 1
+                return entry, True
+            return entry, False
+
+    def store(self, key, response):
+        if response.status_code != 200:
+            return
+        if "no-store" in response.headers.get("Cache-Control", ""):
+            return
+        with self._lock:
+            self._entries[key] = CacheEntry(response, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def revalidate(self, key, entry):
+        """Продление записи после ответа 304 Not Modified"""
+        with self._lock:
+            entry.stale = False
+            entry.expires_at = self.clock() + self.ttl
+            self.revalidated += 1
+
+    def invalidate(self, url):
+        """Пометка устаревшими записей пути и его родительской коллекции"""
+        path = urlsplit(url).path.rstrip("/")
+        parent = path.rsplit("/", 1)[0]
+        with self._lock:
+            for key in list(self._entries):
+                cached_path = urlsplit(key).path.rstrip("/")
+                if cached_path not in (path, parent):
+                    continue
+                entry = self._entries[key]
+                if entry.etag or entry.last_modified:
+                    entry.stale = True
+                else:
+                    # Без валидаторов ревалидация невозможна
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+            }
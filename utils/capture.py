@@ -0,0 +1,85 @@
+import base64
+import threading
+import zlib
+from collections import deque
+
+
+class CapturedExchange:
+    """Запрос и ответ, сохраненные без копирования тел.
+
+    Хранятся ссылки на уже существующие объекты bytes из requests; байты
+    копируются только при форматировании для отчета об упавшем тесте.
+    """
+
+    __slots__ = ("test", "method", "url", "status", "request_body", "response_body", "headers")
+
+    def __init__(self, test, method, url, status, request_body, response_body, headers):
+        self.test = test
+        self.method = method
+        self.url = url
+        self.status = status
+        self.request_body = request_body
+        self.response_body = response_body
+        self.headers = headers
+
+
+class ResponseCapture:
+    """Кольцевой буфер последних HTTP обменов для диагностики падений.
+
+    Буфер хранит не больше maxlen обменов; при выводе каждое тело
+    обрезается до max_bytes через memoryview (без копирования исходного
+    ответа) и при compress сжимается zlib и кодируется в base64.
+    """
+
+    def __init__(self, maxlen=20, max_bytes=16 * 1024, compress=False):
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._exchanges = deque(maxlen=maxlen)
+
+    def add(self, test, method, response):
+        request = response.request
+        body = request.body if request is not None else None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        # Тело потокового ответа не читаем, чтобы не менять поведение клиента
+        content = response._content if response._content_consumed else None
+        exchange = CapturedExchange(test, method, response.url, response.status_code,
+                                    body, content, response.headers)
+        with self._lock:
+            self._exchanges.append(exchange)
+
+    def for_test(self, test):
+        with self._lock:
+            return [exchange for exchange in self._exchanges if exchange.test == test]
+
+    def clear(self):
+        with self._lock:
+            self._exchanges.clear()
+
+    def _format_body(self, body):
+        if body is None:
+            return "<не прочитано (stream)>"
+        if not body:
+            return "<пусто>"
+        view = memoryview(body)[:self.max_bytes]
+        note = f" (показано {len(view)} из {len(body)} байт)" if len(body) > len(view) else ""
+        if self.compress:
+            packed = base64.b64encode(zlib.compress(view)).decode("ascii")
+            return (f"zlib+base64{note}, {len(view)} -> {len(packed)} байт; "
+                    f"zlib.decompress(base64.b64decode(...)):\n{packed}")
+        return bytes(view).decode("utf-8", errors="replace") + note
+
+    def format(self, exchanges):
+        """Текстовое описание обменов для секции отчета pytest"""
+        blocks = []
+        for exchange in exchanges:
+            lines = [f"{exchange.method} {exchange.url} -> {exchange.status}"]
+            content_type = exchange.headers.get("Content-Type")
+            if content_type:
+                lines.append(f"Content-Type: {content_type}")
+            if exchange.request_body:
+                lines.append(f"Запрос: {self._format_body(exchange.request_body)}")
+            lines.append(f"Ответ: {self._format_body(exchange.response_body)}")
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Заголовки, описывающие транспорт, а не содержимое: тело в кассете хранится
+# уже распакованным, поэтому их нельзя воспроизводить как есть
+TRANSPORT_HEADERS = {
+    "connection", "keep-alive", "transfer-encoding",
+    "content-encoding", "content-length",
+}
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """В кассете нет записи для запроса, выполняемого в режиме воспроизведения"""
+
+
+def request_key(method, url, body=None):
+    """Ключ поиска записи: метод, путь, отсортированный query и хэш тела"""
+    parts = urlsplit(url)
+    pairs = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    query = "&".join(f"{name}={value}" for name, value in pairs)
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    body_hash = hashlib.sha1(body).hexdigest() if body else ""
+    return method.upper(), parts.path, query, body_hash
+
+
+def _encode_body(content):
+    try:
+        return content.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return base64.b64encode(content).decode("ascii"), "base64"
+
+
+def _decode_body(record):
+    if record.get("body_encoding") == "base64":
+        return base64.b64decode(record["body"])
+    return record["body"].encode("utf-8")
+
+
+class Cassette:
+    """Кассета запросов и ответов в формате JSON Lines.
+
+    В режиме record каждая пара запрос/ответ дописывается в файл одной
+    компактной строкой. В режиме replay файл один раз загружается в индекс
+    по (метод, путь, query, хэш тела); повторяющиеся одинаковые запросы
+    получают записанные ответы по очереди, а после их исчерпания — последний.
+    """
+
+    def __init__(self, path, mode="replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Неизвестный режим кассеты: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._index = {}
+        self._cursor = {}
+        self._file = None
+        if mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+        else:
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (record["method"], record["path"], record["query"], record["body_hash"])
+                self._index.setdefault(key, []).append(record)
+
+    def __len__(self):
+        return sum(len(records) for records in self._index.values())
+
+    def record(self, request, response):
+        method, path, query, body_hash = request_key(request.method, request.url, request.body)
+        body, body_encoding = _encode_body(response.content)
+        record = {
+            "method": method,
+            "path": path,
+            "query": query,
+            "body_hash": body_hash,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() not in TRANSPORT_HEADERS},
+            "body": body,
+            "body_encoding": body_encoding,
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def play(self, request):
+        key = request_key(request.method, request.url, request.body)
+        with self._lock:
+            records = self._index.get(key)
+            if not records:
+                raise CassetteMissError(
+                    f"Нет записи в кассете {self.path} для {key[0]} {request.url}",
+                    request=request)
+            position = self._cursor.get(key, 0)
+            self._cursor[key] = position + 1
+        return records[min(position, len(records) - 1)]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CassetteAdapter(BaseAdapter):
+    """Транспортный адаптер requests, записывающий или воспроизводящий кассету"""
+
+    def __init__(self, cassette, wrapped):
+        super().__init__()
+        self.cassette = cassette
+        # Настоящий адаптер для записи; его же статистику видит ApiClient
+        self.wrapped = wrapped
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == "record":
+            response = self.wrapped.send(request, **kwargs)
+            self.cassette.record(request, response)
+            return response
+        return self._build_response(request, self.cassette.play(request))
+
+    @staticmethod
+    def _build_response(request, record):
+        content = _decode_body(record)
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.reason = record["reason"]
+        response.headers = CaseInsensitiveDict(record["headers"])
+        response.headers["Content-Length"] = str(len(content))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.raw = io.BytesIO(content)
+        response._content = content
+        response._content_consumed = True
+        response.elapsed = timedelta(0)
+        return response
+
+    def close(self):
+        self.wrapped.close()
+        self.cassette.close()
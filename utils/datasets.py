@@ -0,0 +1,115 @@
+import csv
+import json
+import mmap
+import os
+from abc import ABC, abstractmethod
+from array import array
+
+
+class _MappedDataset(ABC):
+    """Набор данных из файла, построчно индексируемый через mmap.
+
+    При открытии в памяти остаются только смещения строк (8 байт на
+    строку); сами записи разбираются по требованию при обращении по
+    индексу, поэтому размер файла не влияет на память процесса.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = b""
+        self._offsets = array("Q")
+        self._index(self._first_row())
+
+    def _first_row(self):
+        return 0
+
+    def _index(self, position):
+        """Смещения начала и конца каждой непустой строки, начиная с position"""
+        data = self._map
+        size = len(data)
+        offsets = self._offsets
+        while position < size:
+            end = data.find(b"\n", position)
+            if end == -1:
+                end = size
+            if data[position:end].strip():
+                offsets.append(position)
+                offsets.append(end)
+            position = end + 1
+
+    def _line(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"{self.path}: нет записи с индексом {index}")
+        return self._map[self._offsets[2 * index]:self._offsets[2 * index + 1]]
+
+    @abstractmethod
+    def _parse(self, line):
+        """Запись из байтов одной строки файла"""
+
+    def __len__(self):
+        return len(self._offsets) // 2
+
+    def __getitem__(self, index):
+        return self._parse(self._line(index))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+class JsonlDataset(_MappedDataset):
+    """JSON Lines: одна запись (JSON объект) на строку"""
+
+    def _parse(self, line):
+        return json.loads(line)
+
+
+class CsvDataset(_MappedDataset):
+    """CSV с заголовком; записи возвращаются словарями {колонка: значение}.
+
+    Значения CSV — строки; types ({колонка: тип}) задает преобразование,
+    например {"userId": int}. Пустое значение означает отсутствие поля.
+    Строки записей не должны содержать переводов строк внутри кавычек.
+    """
+
+    def __init__(self, path, types=None):
+        self.types = dict(types or {})
+        self.columns = []
+        super().__init__(path)
+
+    def _first_row(self):
+        end = self._map.find(b"\n")
+        header = self._map[:end if end != -1 else len(self._map)]
+        self.columns = next(csv.reader([header.decode("utf-8-sig")]), [])
+        return end + 1 if end != -1 else len(self._map)
+
+    def _parse(self, line):
+        values = next(csv.reader([line.decode("utf-8").rstrip("\r")]))
+        record = {}
+        for column, value in zip(self.columns, values):
+            if value == "":
+                continue
+            convert = self.types.get(column)
+            record[column] = convert(value) if convert is not None else value
+        return record
+
+
+def open_dataset(path, types=None):
+    """Набор данных по расширению файла: .jsonl или .csv"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return JsonlDataset(path)
+    if extension == ".csv":
+        return CsvDataset(path, types)
+    raise ValueError(f"Неподдерживаемый формат набора данных: {path}")
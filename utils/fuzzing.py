@@ -0,0 +1,327 @@
+import itertools
+import json
+import random
+import time
+
+# Значения-представители типов для проверки неверных типов полей
+TYPE_SAMPLES = (None, True, 1, 1.5, "1", [], {})
+
+STRING_LENGTHS = (0, 1, 255, 256, 1024, 65536)
+# Границы целых, которые без потери точности переживают JSON в JavaScript
+INT_BOUNDARIES = (0, 1, -1, 2 ** 31 - 1, 2 ** 53 - 1, -(2 ** 53 - 1))
+UNICODE_STRINGS = (
+    "пост на русском",
+    "emoji 🚀🔥 и флаг 🇷🇺",
+    "שלום עולם",
+    "é́ combining",
+    "nul\x00byte",
+    "lone surrogate \ud800",
+    "‮RTL override",
+    "<script>alert(1)</script>",
+)
+TEMPLATE_VALUES = {int: 1, str: "fuzz", float: 1.0, bool: True}
+
+
+class FuzzCase:
+    """Полезная нагрузка и ожидание: expect_valid — соответствует ли она схеме"""
+
+    def __init__(self, kind, field, payload, expect_valid):
+        self.kind = kind
+        self.field = field
+        self.payload = payload
+        self.expect_valid = expect_valid
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def _field_type(types):
+    return types[0] if isinstance(types, tuple) else types
+
+
+def valid_payload(schema):
+    """Минимальный корректный объект по схеме; id назначает сервер"""
+    return {field: TEMPLATE_VALUES[_field_type(types)]
+            for field, types in schema.fields.items() if field != "id"}
+
+
+def generate_cases(schema, count=None, seed=0):
+    """Генератор валидных и невалидных полезных нагрузок по схеме ресурса.
+
+    Сначала выдаются детерминированные случаи: границы длин строк и
+    значений целых, Unicode, неверные типы, отсутствующие и лишние поля,
+    не-объекты. Затем, до count случаев (или бесконечно при count=None),
+    — случайные комбинации мутаций с фиксированным seed.
+    """
+    base = valid_payload(schema)
+    fields = {field: _field_type(types) for field, types in schema.fields.items() if field in base}
+    required = [field for field in schema.required if field in base]
+
+    def deterministic():
+        yield FuzzCase("valid", None, dict(base), True)
+        for field, field_type in fields.items():
+            if field_type is str:
+                for length in STRING_LENGTHS:
+                    yield FuzzCase("boundary", field, {**base, field: "x" * length}, True)
+                for text in UNICODE_STRINGS:
+                    yield FuzzCase("unicode", field, {**base, field: text}, True)
+            elif field_type is int:
+                for value in INT_BOUNDARIES:
+                    yield FuzzCase("boundary", field, {**base, field: value}, True)
+            for value in TYPE_SAMPLES:
+                if type(value) is not field_type:
+                    yield FuzzCase("wrong_type", field, {**base, field: value}, False)
+        for field in required:
+            payload = dict(base)
+            del payload[field]
+            yield FuzzCase("missing", field, payload, False)
+        yield FuzzCase("missing", "*", {}, not required)
+        yield FuzzCase("extra", "unexpected", {**base, "unexpected": "value"}, True)
+        yield FuzzCase("not_object", None, [base], False)
+        yield FuzzCase("not_object", None, "fuzz", False)
+
+    def randomized():
+        rng = random.Random(seed)
+        mutations = [case for case in deterministic() if case.field in fields]
+        while True:
+            # Сочетание нескольких мутаций разных полей
+            payload = dict(base)
+            expect_valid = True
+            kinds = []
+            for case in rng.sample(mutations, rng.randint(2, 4)):
+                if case.field in case.payload:
+                    payload[case.field] = case.payload[case.field]
+                else:
+                    payload.pop(case.field, None)
+                expect_valid = expect_valid and case.expect_valid
+                kinds.append(f"{case.kind}:{case.field}")
+            yield FuzzCase("combined", ",".join(sorted(set(kinds))), payload, expect_valid)
+
+    cases = itertools.chain(deterministic(), randomized())
+    return itertools.islice(cases, count) if count is not None else cases
+
+
+def check_response(case, response, error=None, strict=False):
+    """Причина нарушения контракта для ответа на случай или None.
+
+    Корректная нагрузка должна создавать ресурс (201) и возвращаться в
+    ответе без искажений. Для некорректной нарушением считается ошибка
+    сервера (5xx), а при strict — и успешный ответ вместо 4xx.
+    """
+    if error is not None:
+        return f"error:{type(error).__name__}"
+    status = response.status_code
+    if status >= 500:
+        return f"status:{status}"
+    if not case.expect_valid:
+        if strict and status < 400:
+            return "accepted_invalid"
+        return None
+    if status != 201:
+        return f"status:{status}"
+    try:
+        body = response.json()
+    except ValueError:
+        return "invalid_json"
+    if not isinstance(body, dict):
+        return "not_object"
+    for field, value in case.payload.items():
+        if body.get(field) != value:
+            return f"echo:{field}"
+    return None
+
+
+def failure_signature(schema, case, reason):
+    """Ключ дедупликации: нарушения схемы в нагрузке и реакция сервера.
+
+    Падения с одинаковым набором нарушений (поле и тип значения либо
+    отсутствие поля) и одинаковой причиной считаются эквивалентными,
+    независимо от конкретных значений и способа генерации.
+    """
+    payload = case.payload
+    if not isinstance(payload, dict):
+        return f"not_object:{type(payload).__name__}", reason
+    violations = []
+    for field, types in schema.fields.items():
+        types = types if isinstance(types, tuple) else (types,)
+        if field not in payload:
+            if field in schema.required and field != "id":
+                violations.append(f"{field}:missing")
+        elif type(payload[field]) not in types:
+            violations.append(f"{field}:{type(payload[field]).__name__}")
+    return ",".join(violations) or "conforms", reason
+
+
+class FuzzFailure:
+    def __init__(self, signature, case, status):
+        self.signature = signature
+        self.case = case
+        self.status = status
+        self.count = 0
+        self.minimal = None
+
+    def to_dict(self):
+        return {
+            "signature": list(self.signature),
+            "count": self.count,
+            "status": self.status,
+            "example": self.case.payload,
+            "minimal": self.minimal,
+        }
+
+
+class FuzzReport:
+    def __init__(self):
+        self.total = 0
+        self.duration = 0.0
+        self.failures = {}
+
+    @property
+    def cases_per_minute(self):
+        return self.total / self.duration * 60 if self.duration else 0.0
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "duration": self.duration,
+            "cases_per_minute": self.cases_per_minute,
+            "failures": [failure.to_dict() for failure in self.failures.values()],
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def format_summary(self):
+        lines = [f"Случаев: {self.total} за {self.duration:.1f} s "
+                 f"({self.cases_per_minute:.0f} в минуту), "
+                 f"уникальных нарушений: {len(self.failures)}"]
+        for failure in self.failures.values():
+            violations, reason = failure.signature
+            lines.append(f"  {reason:<20} {violations} x{failure.count}")
+            shown = failure.minimal if failure.minimal is not None else failure.case.payload
+            lines.append(f"    {json.dumps(shown, ensure_ascii=False)[:200]}")
+        return "\n".join(lines)
+
+
+def _shrink_candidates(payload, field):
+    """Упрощения нагрузки: без лишних полей, короче строки, ближе к нулю числа"""
+    if not isinstance(payload, dict):
+        return
+    for key in payload:
+        if key != field:
+            yield {k: v for k, v in payload.items() if k != key}
+    for key, value in payload.items():
+        if isinstance(value, str) and value:
+            yield {**payload, key: value[:len(value) // 2]}
+        elif type(value) is int and value not in (0, 1, -1):
+            yield {**payload, key: value // 2 if value > 0 else -(-value // 2)}
+
+
+class Fuzzer:
+    """Прогон сгенерированных нагрузок через пакетный путь ApiClient.
+
+    Случаи отправляются пакетами ApiClient.batch() по общему пулу
+    соединений, поэтому генератор читается потоково и память не растет.
+    Нарушения группируются по сигнатуре, для каждой группы первый пример
+    сокращается до минимального воспроизводящего.
+    """
+
+    def __init__(self, client, schema, endpoint="/posts", method="POST",
+                 concurrency=None, batch_size=200, strict=False, max_shrink_requests=50):
+        self.client = client
+        self.schema = schema
+        self.endpoint = endpoint
+        self.method = method
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.strict = strict
+        self.max_shrink_requests = max_shrink_requests
+
+    def run(self, cases):
+        report = FuzzReport()
+        started = time.perf_counter()
+        cases = iter(cases)
+        while True:
+            batch = list(itertools.islice(cases, self.batch_size))
+            if not batch:
+                break
+            results = self.client.batch(
+                [(self.method, self.endpoint, case.payload) for case in batch], self.concurrency)
+            for case, result in zip(batch, results):
+                report.total += 1
+                reason = check_response(case, result.response, result.error, self.strict)
+                if reason is None:
+                    continue
+                signature = failure_signature(self.schema, case, reason)
+                failure = report.failures.get(signature)
+                if failure is None:
+                    status = result.response.status_code if result.response is not None else None
+                    failure = report.failures[signature] = FuzzFailure(signature, case, status)
+                failure.count += 1
+        report.duration = time.perf_counter() - started
+        for failure in report.failures.values():
+            failure.minimal = self.shrink(failure.case, failure.signature)
+        return report
+
+    def _reason(self, case):
+        result = self.client.batch([(self.method, self.endpoint, case.payload)], 1)[0]
+        return check_response(case, result.response, result.error, self.strict)
+
+    def shrink(self, case, signature):
+        """Жадное упрощение нагрузки, пока сохраняется сигнатура нарушения.
+
+        Кандидат принимается, только если в нем те же нарушения схемы и
+        сервер отвечает той же причиной: иначе минимальный пример
+        воспроизводил бы уже другую группу.
+        """
+        violations, reason = signature
+        current = case.payload
+        budget = self.max_shrink_requests
+        improved = True
+        while improved and budget > 0:
+            improved = False
+            for candidate in _shrink_candidates(current, case.field):
+                if budget <= 0:
+                    break
+                candidate_case = FuzzCase(case.kind, case.field, candidate, case.expect_valid)
+                # Нарушения схемы проверяются без запроса к серверу
+                if failure_signature(self.schema, candidate_case, reason)[0] != violations:
+                    continue
+                budget -= 1
+                if self._reason(candidate_case) == reason:
+                    current = candidate
+                    improved = True
+                    break
+        return current
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from utils.api_client import ApiClient
+    from utils.schemas import get_schema
+
+    parser = argparse.ArgumentParser(description="Фаззинг контракта ресурса API")
+    parser.add_argument("--base-url", default="https://jsonplaceholder.typicode.com")
+    parser.add_argument("--schema", default="Post")
+    parser.add_argument("--endpoint", default="/posts")
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--strict", action="store_true",
+                        help="Считать нарушением успешный ответ на некорректную нагрузку")
+    parser.add_argument("--output", default=None, help="Путь к JSON отчету")
+    args = parser.parse_args()
+
+    client = ApiClient(base_url=args.base_url, pool_maxsize=args.concurrency)
+    schema = get_schema(args.schema)
+    fuzzer = Fuzzer(client, schema, endpoint=args.endpoint, concurrency=args.concurrency,
+                    strict=args.strict)
+    fuzz_report = fuzzer.run(generate_cases(schema, args.cases, args.seed))
+    client.close()
+    print(fuzz_report.format_summary())
+    if args.output:
+        print(f"Отчет: {fuzz_report.write_json(args.output)}")
+    raise SystemExit(1 if fuzz_report.failures else 0)
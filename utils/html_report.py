@@ -0,0 +1,172 @@
+from datetime import datetime
+from html import escape
+
+from utils.results import CaseAccumulator, cases_from_junit
+
+STYLE = """
+body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
+.container { max-width: 1200px; margin: 0 auto; background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); display: flex; flex-direction: column; }
+.header { order: -2; text-align: center; padding: 20px; background: #2c3e50; color: white; border-radius: 8px; margin-bottom: 20px; }
+.summary { order: -1; background: #ecf0f1; padding: 15px; border-radius: 8px; margin-bottom: 20px; }
+.test-case { border: 1px solid #bdc3c7; margin: 10px 0; padding: 15px; border-radius: 8px; }
+.passed { border-left: 5px solid #27ae60; background: #d5f4e6; }
+.failed, .error { border-left: 5px solid #e74c3c; background: #fadbd8; }
+.skipped { border-left: 5px solid #f39c12; background: #fdebd0; }
+.test-name { font-weight: bold; font-size: 16px; margin-bottom: 10px; }
+.test-description { color: #7f8c8d; margin-bottom: 10px; }
+.test-details { background: white; padding: 10px; border-radius: 4px; }
+.test-details table { border-collapse: collapse; width: 100%; font-size: 13px; }
+.test-details th, .test-details td { border-bottom: 1px solid #ecf0f1; padding: 4px 8px; text-align: left; }
+.test-details pre { white-space: pre-wrap; font-size: 12px; max-height: 300px; overflow: auto; }
+.timestamp { text-align: right; color: #7f8c8d; font-size: 12px; }
+"""
+
+ICONS = {"passed": "✅", "failed": "❌", "error": "💥", "skipped": "⏭"}
+
+
+class HtmlReportWriter:
+    """Потоковая запись HTML отчета: каждый тест дописывается в файл сразу.
+
+    Сводка известна только в конце прогона, поэтому она пишется последней,
+    а наверх страницы поднимается средствами CSS (order во flex-контейнере).
+    """
+
+    def __init__(self, path, base_url=None):
+        self.path = path
+        self.base_url = base_url
+        self.counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+        self.duration = 0.0
+        self.requests = 0
+        self.bytes_received = 0
+        self._file = None
+
+    def open(self):
+        started = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(f"""<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>API Test Report</title>
+    <style>{STYLE}</style>
+</head>
+<body>
+<div class="container">
+    <div class="header">
+        <h1>📊 API Test Report</h1>
+        <p>JSONPlaceholder API Automated Tests</p>
+        <p>Test Date: {started}</p>
+    </div>
+    <div class="test-results">
+        <h2>🧪 Test Results</h2>
+""")
+        return self
+
+    def add_case(self, case):
+        outcome = case["outcome"]
+        self.counts[outcome] += 1
+        self.duration += case["duration"]
+        self.requests += len(case["requests"])
+
+        endpoints = []
+        for request in case["requests"]:
+            self.bytes_received += request["response_bytes"]
+            endpoint = f"{request['method']} {request['endpoint']}"
+            if endpoint not in endpoints:
+                endpoints.append(endpoint)
+
+        parts = [
+            f'<div class="test-case {outcome}">',
+            f'<div class="test-name">{ICONS[outcome]} {escape(case["name"])}</div>',
+        ]
+        if case["description"]:
+            parts.append(f'<div class="test-description">{escape(case["description"])}</div>')
+        parts.append('<div class="test-details">')
+        if endpoints:
+            parts.append(f"<p><strong>Endpoint:</strong> {escape(', '.join(endpoints))}</p>")
+        parts.append(f"<p><strong>Duration:</strong> {case['duration'] * 1000:.1f} ms</p>")
+        parts.append(f"<p><strong>Result:</strong> {outcome.upper()}</p>")
+        if case["requests"]:
+            parts.append(
+                "<table><tr><th>Request</th><th>Status</th><th>TTFB, ms</th>"
+                "<th>Total, ms</th><th>Sent, B</th><th>Received, B</th></tr>")
+            for request in case["requests"]:
+                ttfb = "—" if request["ttfb"] is None else f"{request['ttfb'] * 1000:.1f}"
+                parts.append(
+                    f"<tr><td>{escape(request['method'])} {escape(request['endpoint'])}</td>"
+                    f"<td>{request['status']}</td>"
+                    f"<td>{ttfb}</td>"
+                    f"<td>{request['total'] * 1000:.1f}</td>"
+                    f"<td>{request['request_bytes']}</td>"
+                    f"<td>{request['response_bytes']}</td></tr>")
+            parts.append("</table>")
+        if case["message"]:
+            parts.append(f"<pre>{escape(case['message'])}</pre>")
+        if case.get("responses"):
+            parts.append("<p><strong>Captured API responses:</strong></p>")
+            parts.append(f"<pre>{escape(case['responses'])}</pre>")
+        parts.append("</div></div>\n")
+        self._file.write("".join(parts))
+
+    def close(self):
+        total = sum(self.counts.values())
+        problems = self.counts["failed"] + self.counts["error"]
+        if total == 0:
+            overall = "⚠️ NO TESTS RUN"
+        elif problems:
+            overall = f"❌ {problems} OF {total} TESTS FAILED"
+        else:
+            overall = "✅ ALL TESTS PASSED"
+        finished = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        base_url = f"<p><strong>Base URL:</strong> {escape(self.base_url)}</p>" if self.base_url else ""
+        self._file.write(f"""    </div>
+    <div class="summary">
+        <h2>📈 Summary</h2>
+        <p><strong>Overall Status:</strong> {overall}</p>
+        {base_url}
+        <p><strong>Total Tests:</strong> {total}
+           (passed {self.counts['passed']}, failed {self.counts['failed']},
+           errors {self.counts['error']}, skipped {self.counts['skipped']})</p>
+        <p><strong>Total Duration:</strong> {self.duration:.2f} s</p>
+        <p><strong>HTTP Requests:</strong> {self.requests}, received {self.bytes_received} bytes</p>
+    </div>
+    <div class="timestamp">Report generated on: {finished}</div>
+</div>
+</body>
+</html>
+""")
+        self._file.close()
+        self._file = None
+        return self.path
+
+
+class HtmlReportPlugin:
+    """Плагин pytest, формирующий HTML отчет по ходу прогона"""
+
+    def __init__(self, path, base_url=None):
+        self.writer = HtmlReportWriter(path, base_url)
+        self.cases = CaseAccumulator()
+
+    def pytest_sessionstart(self, session):
+        self.writer.open()
+
+    def pytest_runtest_logreport(self, report):
+        case = self.cases.accept(report)
+        if case is not None:
+            self.writer.add_case(case)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.writer.close()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        # Вызывается терминальным плагином после pytest_sessionfinish
+        terminalreporter.write_sep("-", f"HTML отчет сохранен: {self.writer.path}")
+
+
+def write_report_from_junit(junit_path, html_path, base_url=None):
+    """HTML отчет по JUnit XML, например объединенному после параллельного прогона"""
+    writer = HtmlReportWriter(html_path, base_url).open()
+    for case in cases_from_junit(junit_path):
+        writer.add_case(case)
+    return writer.close()
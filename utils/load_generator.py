@@ -0,0 +1,198 @@
+import itertools
+import json
+import math
+import threading
+import time
+
+from utils.timings import percentile
+
+# Верхние границы корзин гистограммы задержек в миллисекундах
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LoadResult:
+    """Итоги нагрузочного прогона: пропускная способность, ошибки, задержки"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.error_samples = {}
+        self.duration = 0.0
+
+    def add(self, scenario, latency, error=None):
+        with self._lock:
+            self.latencies.setdefault(scenario, []).append(latency)
+            if error is not None:
+                self.errors[scenario] = self.errors.get(scenario, 0) + 1
+                message = f"{type(error).__name__}: {error}".splitlines()[0]
+                self.error_samples.setdefault(message, 0)
+                self.error_samples[message] += 1
+
+    @property
+    def total(self):
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    @property
+    def throughput(self):
+        return self.total / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self):
+        return self.error_count / self.total if self.total else 0.0
+
+    def histogram(self):
+        """Число сценариев по корзинам задержки; последняя корзина — выше 5 с"""
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for values in self.latencies.values():
+            for latency in values:
+                latency_ms = latency * 1000
+                for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                    if latency_ms <= bound:
+                        counts[index] += 1
+                        break
+                else:
+                    counts[-1] += 1
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return list(zip(labels, counts))
+
+    def to_dict(self):
+        scenarios = {}
+        for scenario, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            scenarios[scenario] = {
+                "count": len(values),
+                "errors": self.errors.get(scenario, 0),
+                "p50": percentile(ordered, 50),
+                "p95": percentile(ordered, 95),
+                "p99": percentile(ordered, 99),
+                "max": ordered[-1],
+            }
+        return {
+            "duration": self.duration,
+            "total": self.total,
+            "errors": self.error_count,
+            "throughput": self.throughput,
+            "error_rate": self.error_rate,
+            "scenarios": scenarios,
+            "histogram": dict(self.histogram()),
+            "error_samples": self.error_samples,
+        }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def format_summary(self):
+        lines = [
+            f"Длительность: {self.duration:.1f} с, сценариев: {self.total}, "
+            f"пропускная способность: {self.throughput:.1f}/с, "
+            f"ошибки: {self.error_count} ({self.error_rate:.2%})",
+            f"{'scenario':<20} {'count':>7} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}",
+        ]
+        for scenario, stats in self.to_dict()["scenarios"].items():
+            lines.append(
+                f"{scenario:<20} {stats['count']:>7} {stats['errors']:>7} "
+                f"{stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f} "
+                f"{stats['p99'] * 1000:>9.1f} {stats['max'] * 1000:>9.1f}")
+        lines.append("Гистограмма задержек:")
+        total = self.total or 1
+        for label, count in self.histogram():
+            if count:
+                lines.append(f"  {label:>9} {count:>7} {'#' * max(1, round(40 * count / total))}")
+        for message, count in self.error_samples.items():
+            lines.append(f"  ошибка x{count}: {message}")
+        return "\n".join(lines)
+
+
+class LoadGenerator:
+    """Нагрузка из функциональных сценариев поверх ApiClient.
+
+    Сценарий — функция, принимающая ApiClient; упавшая проверка или
+    исключение считается ошибкой. Если задан rps, сценарии запускаются по
+    расписанию с целевой частотой (открытая модель), иначе каждый из
+    concurrency потоков выполняет сценарии подряд (закрытая модель).
+    ramp_up — время линейного выхода на целевую нагрузку.
+    """
+
+    def __init__(self, client_factory, scenarios, concurrency=10, rps=None,
+                 duration=30.0, ramp_up=0.0):
+        self.client_factory = client_factory
+        self.scenarios = scenarios
+        self.concurrency = concurrency
+        self.rps = rps
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self._lock = threading.Lock()
+        self._names = itertools.cycle(sorted(scenarios))
+        self._slots = 0
+
+    def _next_scenario(self):
+        with self._lock:
+            return next(self._names)
+
+    def _slot_time(self, index):
+        """Момент запуска сценария с номером index от начала прогона.
+
+        При линейном росте частоты от 0 до rps за ramp_up к моменту t
+        запущено rps * t² / (2 * ramp_up) сценариев, поэтому n-й слот
+        приходится на sqrt(2 * n * ramp_up / rps); после разгона слоты идут
+        с постоянным интервалом 1 / rps.
+        """
+        ramp_slots = self.rps * self.ramp_up / 2
+        if index < ramp_slots:
+            return math.sqrt(2 * index * self.ramp_up / self.rps)
+        return self.ramp_up + (index - ramp_slots) / self.rps
+
+    def _wait_for_slot(self, started, deadline):
+        """Ожидание очередного момента запуска по расписанию rps"""
+        with self._lock:
+            index = self._slots
+            self._slots += 1
+        start_at = started + self._slot_time(index)
+        if start_at >= deadline:
+            return False
+        delay = start_at - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def _worker(self, index, started, deadline, result):
+        client = self.client_factory()
+        try:
+            if self.rps is None and self.ramp_up:
+                # В закрытой модели нагрузка наращивается поэтапным стартом потоков
+                time.sleep(self.ramp_up * index / self.concurrency)
+            while time.perf_counter() < deadline:
+                if self.rps is not None and not self._wait_for_slot(started, deadline):
+                    break
+                name = self._next_scenario()
+                scenario_started = time.perf_counter()
+                try:
+                    self.scenarios[name](client)
+                except Exception as error:
+                    result.add(name, time.perf_counter() - scenario_started, error)
+                else:
+                    result.add(name, time.perf_counter() - scenario_started)
+        finally:
+            client.close()
+
+    def run(self):
+        result = LoadResult()
+        started = time.perf_counter()
+        deadline = started + self.duration
+        threads = [
+            threading.Thread(target=self._worker, args=(index, started, deadline, result), daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.duration = time.perf_counter() - started
+        return result
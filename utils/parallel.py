@@ -0,0 +1,89 @@
+import xml.etree.ElementTree as ET
+
+
+def resource_key(item):
+    """Ключ группы теста: общий ресурс из маркера resource либо сам тест.
+
+    Тесты, работающие с одним изменяемым ресурсом (например /posts/1),
+    попадают в одну группу и выполняются одним воркером последовательно.
+    """
+    marker = item.get_closest_marker("resource")
+    if marker is not None and marker.args:
+        return f"resource:{marker.args[0]}"
+    return item.nodeid
+
+
+def group_items(items):
+    """Группировка тестов по ресурсу с сохранением порядка объявления"""
+    groups = {}
+    for item in items:
+        groups.setdefault(resource_key(item), []).append(item)
+    return groups
+
+
+def assign_groups(groups, worker_count, weights=None):
+    """Детерминированное распределение групп по воркерам.
+
+    Группы раздаются по убыванию веса наименее загруженному воркеру, поэтому
+    каждый воркер, получив одинаковый набор тестов, вычисляет одно и то же
+    распределение без обмена данными. По умолчанию вес группы — число тестов.
+    """
+    if weights is None:
+        weights = {key: len(group) for key, group in groups.items()}
+    loads = [0.0] * worker_count
+    assignment = {}
+    for key in sorted(groups, key=lambda k: (-weights[k], k)):
+        worker = min(range(worker_count), key=lambda i: (loads[i], i))
+        assignment[key] = worker
+        loads[worker] += weights[key]
+    return assignment
+
+
+def select_worker_items(items, worker_index, worker_count, weights=None):
+    """Разделение собранных тестов на выбранные для воркера и остальные"""
+    groups = group_items(items)
+    assignment = assign_groups(groups, worker_count, weights)
+    selected = []
+    deselected = []
+    for item in items:
+        if assignment[resource_key(item)] == worker_index:
+            selected.append(item)
+        else:
+            deselected.append(item)
+    return selected, deselected
+
+
+def merge_junit_reports(report_paths, output_path):
+    """Объединение JUnit XML отчетов воркеров в один отчет"""
+    merged_suite = ET.Element("testsuite", name="pytest")
+    counters = {"tests": 0, "errors": 0, "failures": 0, "skipped": 0}
+    elapsed = 0.0
+    timestamp = None
+
+    for path in report_paths:
+        root = ET.parse(path).getroot()
+        suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+        for suite in suites:
+            for name in counters:
+                counters[name] += int(suite.get(name, 0))
+            # Воркеры работают одновременно, поэтому длительность прогона —
+            # это длительность самого долгого воркера, а не сумма
+            elapsed = max(elapsed, float(suite.get("time", 0)))
+            if timestamp is None or suite.get("timestamp", "") < timestamp:
+                timestamp = suite.get("timestamp")
+            hostname = suite.get("hostname")
+            if hostname:
+                merged_suite.set("hostname", hostname)
+            for testcase in suite.iter("testcase"):
+                merged_suite.append(testcase)
+
+    for name, value in counters.items():
+        merged_suite.set(name, str(value))
+    merged_suite.set("time", f"{elapsed:.3f}")
+    if timestamp:
+        merged_suite.set("timestamp", timestamp)
+
+    root = ET.Element("testsuites")
+    root.append(merged_suite)
+    ET.ElementTree(root).write(output_path, encoding="utf-8", xml_declaration=True)
+    return output_path
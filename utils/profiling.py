@@ -0,0 +1,183 @@
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+
+# Кадр, с которого начинаются стеки: вызов тестовой функции в pytest
+ROOT_FRAME = "_pytest.python:pytest_pyfunc_call"
+
+
+class TestProfile:
+    """Ресурсы, потраченные фазой call одного теста"""
+
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_memory = 0
+        self.blocks = 0
+        self.requests = 0
+        self.http_time = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    @property
+    def overhead(self):
+        """Доля времени теста вне HTTP запросов: разбор JSON, проверки, подготовка"""
+        if not self.wall:
+            return 0.0
+        return max(self.wall - self.http_time, 0.0) / self.wall
+
+    def to_dict(self):
+        return {**self.__dict__, "overhead": self.overhead}
+
+
+class StackSampler:
+    """Периодический снимок стека потока теста в формате folded stacks.
+
+    Результат ("модуль:функция;...;модуль:функция число") принимают
+    flamegraph.pl и speedscope.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.stacks = {}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                name = f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+                if name == ROOT_FRAME:
+                    # Кадры pytest ниже вызова тестовой функции одинаковы у всех тестов
+                    break
+                frames.append(name)
+                frame = frame.f_back
+            if frames:
+                key = ";".join(reversed(frames))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+
+class ProfilingPlugin:
+    """Плагин pytest, замеряющий ресурсы каждого теста на стороне клиента.
+
+    CPU — время процесса (process_time), поэтому с --stub-server в него
+    входит и работа локального сервера. Память — пик tracemalloc сверх
+    уровня на начало теста, blocks — прирост числа выделенных блоков.
+    Трафик и время в HTTP берутся из замеров ApiClient (свойство
+    api_requests). Тесты, у которых вне HTTP проходит больше
+    overhead_threshold времени, отмечаются в сводке.
+    """
+
+    def __init__(self, report_path=None, stacks_path=None, stacks_top=5,
+                 overhead_threshold=0.3, min_wall=0.005):
+        self.report_path = report_path
+        self.stacks_path = stacks_path
+        self.stacks_top = stacks_top
+        self.overhead_threshold = overhead_threshold
+        self.min_wall = min_wall
+        self.profiles = {}
+        self.stacks = {}
+
+    def pytest_sessionstart(self, session):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        profile = self.profiles[item.nodeid] = TestProfile(item.nodeid)
+        sampler = None
+        if self.stacks_path:
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+        current_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        yield
+        profile.wall = time.perf_counter() - wall
+        profile.cpu = time.process_time() - cpu
+        profile.blocks = sys.getallocatedblocks() - blocks
+        profile.peak_memory = max(tracemalloc.get_traced_memory()[1] - current_memory, 0)
+        if sampler is not None:
+            self.stacks[item.nodeid] = sampler.stop()
+
+    def pytest_runtest_logreport(self, report):
+        profile = self.profiles.get(report.nodeid)
+        if report.when != "teardown" or profile is None:
+            return
+        for name, value in report.user_properties:
+            if name != "api_requests":
+                continue
+            for request in json.loads(value):
+                profile.requests += 1
+                profile.http_time += request["total"] + request.get("wait", 0.0)
+                profile.request_bytes += request["request_bytes"]
+                profile.response_bytes += request["response_bytes"]
+
+    def flagged(self):
+        return [profile for profile in self.profiles.values()
+                if profile.wall >= self.min_wall and profile.overhead >= self.overhead_threshold]
+
+    def slowest(self, count):
+        return sorted(self.profiles.values(), key=lambda profile: -profile.wall)[:count]
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if self.report_path:
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump([profile.to_dict() for profile in self.profiles.values()],
+                          f, ensure_ascii=False, indent=2)
+        if self.stacks_path:
+            # Стеки только самых долгих тестов; корень стека — node ID теста
+            with open(self.stacks_path, "w", encoding="utf-8") as f:
+                for profile in self.slowest(self.stacks_top):
+                    root = profile.nodeid.replace(";", "_")
+                    for stack, count in sorted(self.stacks.get(profile.nodeid, {}).items()):
+                        f.write(f"{root};{stack} {count}\n")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.profiles:
+            return
+        terminalreporter.section("API test profile")
+        terminalreporter.write_line(
+            f"{'test':<52} {'wall ms':>8} {'cpu ms':>7} {'out %':>6} "
+            f"{'peak KiB':>9} {'blocks':>7} {'req':>4} {'sent B':>8} {'recv B':>9}")
+        for profile in self.slowest(15):
+            name = profile.nodeid.split("::", 1)[-1]
+            terminalreporter.write_line(
+                f"{name[-52:]:<52} {profile.wall * 1000:>8.1f} {profile.cpu * 1000:>7.1f} "
+                f"{profile.overhead * 100:>6.0f} {profile.peak_memory / 1024:>9.1f} "
+                f"{profile.blocks:>7} {profile.requests:>4} "
+                f"{profile.request_bytes:>8} {profile.response_bytes:>9}")
+        flagged = self.flagged()
+        if flagged:
+            terminalreporter.write_line(
+                f"Вне HTTP больше {self.overhead_threshold:.0%} времени теста "
+                f"(разбор JSON, циклы проверок, подготовка данных):")
+            for profile in sorted(flagged, key=lambda profile: -profile.overhead):
+                terminalreporter.write_line(
+                    f"  {profile.nodeid}: {profile.overhead:.0%} из {profile.wall * 1000:.1f} ms")
+        if self.report_path:
+            terminalreporter.write_line(f"Профиль тестов: {self.report_path}")
+        if self.stacks_path:
+            terminalreporter.write_line(f"Стеки для flame graph: {self.stacks_path}")
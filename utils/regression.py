@@ -0,0 +1,145 @@
+import math
+from statistics import median
+
+
+def _ranks(values):
+    """Ранги значений (с единицы) со средним рангом для совпадений"""
+    order = sorted(range(len(values)), key=values.__getitem__)
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = rank
+        i = j + 1
+    return ranks
+
+
+def _normal_sf(z):
+    """Вероятность превышения z для стандартного нормального распределения"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_greater(current, baseline):
+    """Односторонний U-критерий Манна — Уитни: current смещена вправо (медленнее).
+
+    Возвращает p-значение нормальной аппроксимации с поправкой на
+    совпадения и непрерывность.
+    """
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 1.0
+    ranks = _ranks(list(current) + list(baseline))
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+
+    n = n1 + n2
+    ties = {}
+    for rank in ranks:
+        ties[rank] = ties.get(rank, 0) + 1
+    tie_term = sum(t ** 3 - t for t in ties.values()) / (n * (n - 1)) if n > 1 else 0
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance <= 0:
+        return 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return _normal_sf(z)
+
+
+def ks_greater(current, baseline):
+    """Односторонний критерий Колмогорова — Смирнова: распределение current
+    сдвинуто в сторону больших задержек (в том числе только хвост).
+
+    Возвращает статистику D+ и асимптотическое p-значение.
+    """
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 0.0, 1.0
+    current = sorted(current)
+    baseline = sorted(baseline)
+    d = 0.0
+    i = j = 0
+    while i < n1 and j < n2:
+        value = min(current[i], baseline[j])
+        while i < n1 and current[i] == value:
+            i += 1
+        while j < n2 and baseline[j] == value:
+            j += 1
+        # Насколько доля быстрых запросов в базовой выборке больше текущей
+        d = max(d, j / n2 - i / n1)
+    effective = n1 * n2 / (n1 + n2)
+    return d, min(1.0, math.exp(-2 * effective * d * d))
+
+
+class EndpointComparison:
+    def __init__(self, method, endpoint, recent, baseline):
+        self.method = method
+        self.endpoint = endpoint
+        self.recent_count = len(recent)
+        self.baseline_count = len(baseline)
+        self.recent_median = median(recent) if recent else 0.0
+        self.baseline_median = median(baseline) if baseline else 0.0
+        self.ratio = (self.recent_median / self.baseline_median
+                      if self.baseline_median else 1.0)
+        self.p_mann_whitney = mann_whitney_greater(recent, baseline)
+        self.ks_statistic, self.p_ks = ks_greater(recent, baseline)
+        self.status = "ok"
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def detect_regressions(store, recent_runs=5, baseline_runs=20, alpha=0.01,
+                       tolerance=0.2, min_samples=5, field="total", target=None):
+    """Сравнение задержек последних прогонов с базовой линией из истории.
+
+    Выборка последних recent_runs прогонов сравнивается с выборкой
+    предшествующих baseline_runs прогонов по каждому эндпоинту. Если задан
+    target, учитываются только прогоны на этой цели, чтобы смена
+    развертывания не выглядела регрессией. Регрессией считается только
+    статистически значимое (U-критерий или КС-критерий, p < alpha) и
+    практически заметное (медиана выросла больше чем на tolerance)
+    замедление. При недостатке данных статус — insufficient.
+    """
+    runs = [run["run"] for run in store.runs if target is None or run.get("target") == target]
+    if len(runs) <= recent_runs:
+        return []
+    runs = runs[-(recent_runs + baseline_runs):]
+    recent_set = set(runs[-recent_runs:])
+    baseline_set = set(runs[:-recent_runs])
+    # Колонки читаются с самого раннего из отобранных прогонов
+    window = len(store.runs) - runs[0]
+    recent_window = len(store.runs) - runs[-recent_runs]
+
+    comparisons = []
+    for method, endpoint in store.endpoints(recent_window):
+        samples = store.request_samples(method, endpoint, window, field)
+        recent = [value for run, values in samples.items() if run in recent_set for value in values]
+        if not recent:
+            # Эндпоинт встречался только в прогонах на других целях
+            continue
+        baseline = [value for run, values in samples.items() if run in baseline_set for value in values]
+        comparison = EndpointComparison(method, endpoint, recent, baseline)
+        if len(recent) < min_samples or len(baseline) < min_samples:
+            comparison.status = "insufficient"
+        elif (comparison.ratio > 1 + tolerance
+              and min(comparison.p_mann_whitney, comparison.p_ks) < alpha):
+            comparison.status = "regression"
+        comparisons.append(comparison)
+    return comparisons
+
+
+def format_comparisons(comparisons):
+    lines = [
+        f"{'endpoint':<32} {'status':<13} {'recent':>9} {'baseline':>9} "
+        f"{'ratio':>6} {'p(MW)':>8} {'p(KS)':>8} {'n':>9}",
+    ]
+    for c in comparisons:
+        lines.append(
+            f"{c.method + ' ' + c.endpoint:<32} {c.status:<13} "
+            f"{c.recent_median * 1000:>9.1f} {c.baseline_median * 1000:>9.1f} "
+            f"{c.ratio:>6.2f} {c.p_mann_whitney:>8.4f} {c.p_ks:>8.4f} "
+            f"{c.recent_count:>4}/{c.baseline_count:<4}")
+    return "\n".join(lines)
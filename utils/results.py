@@ -0,0 +1,88 @@
+import json
+import xml.etree.ElementTree as ET
+
+
+def _properties_to_case(case, properties):
+    for name, value in properties:
+        if name == "api_requests":
+            case["requests"].extend(json.loads(value))
+        elif name == "description":
+            case["description"] = value
+        elif name == "api_responses":
+            case["responses"] = value
+
+
+def new_case(nodeid):
+    return {
+        "nodeid": nodeid,
+        "name": nodeid.split("::")[-1],
+        "outcome": "passed",
+        "duration": 0.0,
+        "description": "",
+        "message": "",
+        "responses": "",
+        "requests": [],
+    }
+
+
+class CaseAccumulator:
+    """Сборка итогов теста из отчетов pytest по фазам setup/call/teardown.
+
+    Результат теста известен только после teardown, поэтому accept()
+    возвращает готовую запись лишь на этой фазе; в памяти держатся только
+    выполняющиеся в данный момент тесты.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def accept(self, report):
+        case = self._pending.setdefault(report.nodeid, new_case(report.nodeid))
+        case["duration"] += report.duration
+
+        if report.failed:
+            # Падение в setup/teardown — ошибка окружения, а не теста
+            outcome = "failed" if report.when == "call" else "error"
+            if case["outcome"] in ("passed", "skipped"):
+                case["outcome"] = outcome
+                case["message"] = str(report.longrepr)
+        elif report.skipped and case["outcome"] == "passed":
+            case["outcome"] = "skipped"
+            if isinstance(report.longrepr, tuple):
+                case["message"] = report.longrepr[2]
+
+        if report.when != "teardown":
+            return None
+        _properties_to_case(case, report.user_properties)
+        return self._pending.pop(report.nodeid)
+
+
+def _junit_nodeid(classname, name):
+    """Восстановление node ID pytest из classname и name JUnit отчета"""
+    module, _, last = classname.rpartition(".")
+    if last.startswith("Test") and module:
+        return f"{module.replace('.', '/')}.py::{last}::{name}"
+    return f"{classname.replace('.', '/')}.py::{name}"
+
+
+def cases_from_junit(path):
+    """Потоковое чтение записей тестов из JUnit XML отчета"""
+    for _, element in ET.iterparse(path, events=("end",)):
+        if element.tag != "testcase":
+            continue
+        nodeid = _junit_nodeid(element.get("classname", ""), element.get("name"))
+        case = new_case(nodeid)
+        case["duration"] = float(element.get("time", 0))
+        for outcome, tag in (("failed", "failure"), ("error", "error"), ("skipped", "skipped")):
+            child = element.find(tag)
+            if child is not None:
+                case["outcome"] = outcome
+                case["message"] = child.text or child.get("message", "")
+                break
+        properties = element.find("properties")
+        if properties is not None:
+            _properties_to_case(
+                case,
+                [(prop.get("name"), prop.get("value")) for prop in properties.iter("property")])
+        element.clear()
+        yield case
@@ -0,0 +1,274 @@
+import json
+import math
+import os
+from array import array
+from datetime import datetime
+
+from utils.results import CaseAccumulator
+from utils.timings import percentile
+
+OUTCOME_CODES = {"passed": 0, "failed": 1, "error": 2, "skipped": 3}
+OUTCOME_NAMES = {code: name for name, code in OUTCOME_CODES.items()}
+
+# Цель прогонов на локальном сервере-заглушке (--stub-server)
+STUB_TARGET = "stub"
+
+
+def run_target(stub_server, base_url):
+    """Цель прогона для истории: задержки разных целей не сравниваются"""
+    return STUB_TARGET if stub_server else base_url.rstrip("/")
+
+# Таблицы хранилища: колонка -> typecode модуля array.
+# Строковые значения хранятся кодами из общего словаря строк.
+TABLES = {
+    "tests": {
+        "run": "I",
+        "nodeid": "I",
+        "outcome": "B",
+        "duration": "d",
+    },
+    "requests": {
+        "run": "I",
+        "test": "I",
+        "method": "I",
+        "endpoint": "I",
+        "status": "H",
+        "dns": "d",
+        "connect": "d",
+        "tls": "d",
+        "ttfb": "d",
+        "total": "d",
+        "request_bytes": "Q",
+        "response_bytes": "Q",
+    },
+}
+
+
+class RunBuffer:
+    """Строки одного прогона, накапливаемые в компактных массивах до записи"""
+
+    def __init__(self, store, run):
+        self.store = store
+        self.run = run
+        self.columns = {
+            table: {name: array(typecode) for name, typecode in columns.items()}
+            for table, columns in TABLES.items()
+        }
+
+    def add_case(self, case):
+        tests = self.columns["tests"]
+        test_code = self.store.string_code(case["nodeid"])
+        tests["run"].append(self.run)
+        tests["nodeid"].append(test_code)
+        tests["outcome"].append(OUTCOME_CODES[case["outcome"]])
+        tests["duration"].append(case["duration"])
+
+        requests = self.columns["requests"]
+        for request in case["requests"]:
+            requests["run"].append(self.run)
+            requests["test"].append(test_code)
+            requests["method"].append(self.store.string_code(request["method"]))
+            requests["endpoint"].append(self.store.string_code(request["endpoint"]))
+            requests["status"].append(request["status"] or 0)
+            for name in ("dns", "connect", "tls", "ttfb", "total"):
+                # Незамеренная фаза хранится как NaN и не попадает в выборки
+                value = request[name]
+                requests[name].append(math.nan if value is None else value)
+            requests["request_bytes"].append(request["request_bytes"])
+            requests["response_bytes"].append(request["response_bytes"])
+
+
+class ResultsStore:
+    """Append-only колоночное хранилище результатов прогонов.
+
+    Каждая колонка — отдельный бинарный файл массива фиксированного типа,
+    поэтому запрос по истории читает только нужные колонки и только строки
+    последних прогонов. Запись прогона в runs.jsonl выполняется последней
+    и служит отметкой фиксации: хвосты колонок от прерванной записи
+    отбрасываются при следующем добавлении.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.runs = self._read_jsonl("runs.jsonl")
+        self.strings = self._read_jsonl("strings.jsonl")
+        self._codes = {value: code for code, value in enumerate(self.strings)}
+        self._committed_strings = len(self.strings)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read_jsonl(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _rows(self, table):
+        """Число зафиксированных строк таблицы"""
+        return self.runs[-1][table][1] if self.runs else 0
+
+    def string_code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def new_run(self):
+        return RunBuffer(self, len(self.runs))
+
+    def commit(self, buffer, label=None, timestamp=None, target=None):
+        """Дописывание прогона в колонки и фиксация в runs.jsonl.
+
+        target — тестируемое развертывание (run_target()); по нему
+        отбираются прогоны для сравнения задержек.
+        """
+        ranges = {}
+        for table, columns in buffer.columns.items():
+            start = self._rows(table)
+            for name, values in columns.items():
+                path = self._path(f"{table}.{name}.bin")
+                with open(path, "ab") as f:
+                    # Отбрасываем незафиксированный хвост прерванной записи
+                    f.truncate(start * values.itemsize)
+                    values.tofile(f)
+            ranges[table] = [start, start + len(columns["run"])]
+
+        with open(self._path("strings.jsonl"), "a", encoding="utf-8") as f:
+            for value in self.strings[self._committed_strings:]:
+                f.write(json.dumps(value, ensure_ascii=False) + "\n")
+        self._committed_strings = len(self.strings)
+
+        run = {
+            "run": buffer.run,
+            "timestamp": timestamp or datetime.now().isoformat(timespec="seconds"),
+            "label": label,
+            "target": target,
+            **ranges,
+        }
+        with open(self._path("runs.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+        self.runs.append(run)
+        return buffer.run
+
+    def append_run(self, cases, label=None, timestamp=None, target=None):
+        """Запись прогона из итерируемого набора записей тестов"""
+        buffer = self.new_run()
+        for case in cases:
+            buffer.add_case(case)
+        return self.commit(buffer, label, timestamp, target)
+
+    def column(self, table, name, last_runs=None):
+        """Значения колонки за последние last_runs прогонов (или за все)"""
+        typecode = TABLES[table][name]
+        values = array(typecode)
+        if not self.runs:
+            return values
+        runs = self.runs[-last_runs:] if last_runs else self.runs
+        start, end = runs[0][table][0], runs[-1][table][1]
+        path = self._path(f"{table}.{name}.bin")
+        with open(path, "rb") as f:
+            f.seek(start * values.itemsize)
+            values.fromfile(f, end - start)
+        return values
+
+    def request_samples(self, method, endpoint, last_runs=None, field="total"):
+        """Значения фазы запроса по прогонам: {номер прогона: [значения]}"""
+        method_code = self._codes.get(method)
+        endpoint_code = self._codes.get(endpoint)
+        samples = {}
+        if method_code is None or endpoint_code is None:
+            return samples
+        runs = self.column("requests", "run", last_runs)
+        methods = self.column("requests", "method", last_runs)
+        endpoints = self.column("requests", "endpoint", last_runs)
+        values = self.column("requests", field, last_runs)
+        for run, row_method, row_endpoint, value in zip(runs, methods, endpoints, values):
+            if row_method == method_code and row_endpoint == endpoint_code and not math.isnan(value):
+                samples.setdefault(run, []).append(value)
+        return samples
+
+    def latency_trend(self, method, endpoint, p=95, last_runs=50, field="total"):
+        """Перцентиль фазы запроса по каждому из последних прогонов.
+
+        Например, latency_trend("PATCH", "/posts/1", p=95, last_runs=50)
+        возвращает [(номер прогона, время прогона, p95 в секундах), ...].
+        """
+        samples = self.request_samples(method, endpoint, last_runs, field)
+        return [
+            (run, self.runs[run]["timestamp"], percentile(sorted(values), p))
+            for run, values in sorted(samples.items())
+        ]
+
+    def endpoints(self, last_runs=None):
+        """Пары (метод, эндпоинт), встречавшиеся в последних прогонах"""
+        methods = self.column("requests", "method", last_runs)
+        endpoints = self.column("requests", "endpoint", last_runs)
+        return sorted({(self.strings[m], self.strings[e]) for m, e in zip(methods, endpoints)})
+
+    def test_history(self, last_runs=None):
+        """История тестов: {node ID: [(прогон, исход, длительность), ...]}"""
+        history = {}
+        columns = [self.column("tests", name, last_runs)
+                   for name in ("run", "nodeid", "outcome", "duration")]
+        for run, nodeid, outcome, duration in zip(*columns):
+            history.setdefault(self.strings[nodeid], []).append(
+                (run, OUTCOME_NAMES[outcome], duration))
+        return history
+
+    def test_endpoints(self, last_runs=None):
+        """Запросы, которые выполнял каждый тест: {node ID: {(метод, эндпоинт)}}"""
+        endpoints = {}
+        columns = [self.column("requests", name, last_runs)
+                   for name in ("test", "method", "endpoint")]
+        for test, method, endpoint in set(zip(*columns)):
+            endpoints.setdefault(self.strings[test], set()).add(
+                (self.strings[method], self.strings[endpoint]))
+        return endpoints
+
+
+class ResultsStorePlugin:
+    """Плагин pytest, дописывающий результаты прогона в ResultsStore"""
+
+    def __init__(self, directory, label=None, target=None):
+        self.store = ResultsStore(directory)
+        self.buffer = self.store.new_run()
+        self.cases = CaseAccumulator()
+        self.label = label
+        self.target = target
+
+    def pytest_runtest_logreport(self, report):
+        case = self.cases.accept(report)
+        if case is not None:
+            self.buffer.add_case(case)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        self.store.commit(self.buffer, self.label, target=self.target)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Тренды задержек по истории прогонов")
+    parser.add_argument("directory", help="Каталог хранилища результатов")
+    parser.add_argument("--endpoint", default=None,
+                        help='Запрос в виде "PATCH /posts/1"; по умолчанию все эндпоинты')
+    parser.add_argument("--p", type=float, default=95, help="Перцентиль")
+    parser.add_argument("--last", type=int, default=50, help="Число последних прогонов")
+    parser.add_argument("--field", default="total",
+                        choices=["dns", "connect", "tls", "ttfb", "total"])
+    args = parser.parse_args()
+
+    store = ResultsStore(args.directory)
+    if args.endpoint:
+        targets = [tuple(args.endpoint.split(" ", 1))]
+    else:
+        targets = store.endpoints(args.last)
+    for method, endpoint in targets:
+        print(f"{method} {endpoint} p{args.p:g} {args.field}, мс:")
+        for run, timestamp, value in store.latency_trend(method, endpoint, args.p, args.last, args.field):
+            print(f"  #{run:<5} {timestamp}  {value * 1000:9.1f}")
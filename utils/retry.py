@@ -0,0 +1,249 @@
+import os
+import random
+import struct
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: общий для процессов лимит недоступен
+    fcntl = None
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Статус ограничения частоты: сервер отклоняет запрос до обработки, поэтому
+# он повторяется для любого метода. 503 сюда не входит: прокси или
+# перегруженный бэкенд может вернуть его уже после записи, и повтор POST
+# создал бы дубликат
+THROTTLE_STATUSES = frozenset({429})
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Запрос отклонен: размыкатель открыт после серии отказов сервера"""
+
+
+class RetryPolicy:
+    """Повторы с экспоненциальной задержкой и полным джиттером.
+
+    Ответы со статусами из retry_statuses и сетевые ошибки повторяются для
+    идемпотентных методов; 429 — для любых. Заголовок Retry-After
+    имеет приоритет над вычисленной задержкой.
+    """
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30.0,
+                 jitter=True, retry_statuses=(429, 500, 502, 503, 504)):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def can_retry(self, method, attempt, response=None):
+        if attempt >= self.max_retries:
+            return False
+        if response is None:
+            return method in IDEMPOTENT_METHODS
+        if response.status_code not in self.retry_statuses:
+            return False
+        return method in IDEMPOTENT_METHODS or response.status_code in THROTTLE_STATUSES
+
+    def backoff(self, attempt, response=None):
+        """Задержка перед повтором номер attempt + 1, в секундах"""
+        retry_after = self.retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    @staticmethod
+    def retry_after(response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        if value.strip().isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов: rate токенов в секунду, запас capacity"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.time()
+
+    def _load(self):
+        return self._tokens, self._updated
+
+    def _save(self, tokens, updated):
+        self._tokens, self._updated = tokens, updated
+
+    def _locked(self):
+        return self._lock
+
+    def _take(self):
+        """Попытка взять токен; возвращает время ожидания до следующей попытки"""
+        with self._locked():
+            tokens, updated = self._load()
+            now = time.time()
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._save(tokens - 1, now)
+                return 0.0
+            self._save(tokens, now)
+            return (1 - tokens) / self.rate
+
+    def acquire(self):
+        """Ожидание токена; возвращает время, проведенное в ожидании"""
+        waited = 0.0
+        while True:
+            wait = self._take()
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+class _FileLock:
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def __enter__(self):
+        self.bucket._thread_lock.acquire()
+        self.bucket._file = open(self.bucket.path, "r+b")
+        fcntl.flock(self.bucket._file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self.bucket._file, fcntl.LOCK_UN)
+            self.bucket._file.close()
+        finally:
+            self.bucket._thread_lock.release()
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket, общий для процессов-воркеров через файл состояния.
+
+    Состояние (число токенов и время обновления) хранится в файле и
+    изменяется под эксклюзивной блокировкой flock. Без fcntl (Windows)
+    работает как обычный TokenBucket в пределах процесса.
+    """
+
+    STATE = struct.Struct("dd")
+
+    def __init__(self, rate, path, capacity=None):
+        super().__init__(rate, capacity)
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+        if fcntl is not None:
+            try:
+                fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                pass
+            else:
+                # Первый процесс инициализирует полный запас токенов
+                with os.fdopen(fd, "wb") as f:
+                    f.write(self.STATE.pack(self.capacity, time.time()))
+
+    def _locked(self):
+        if fcntl is None:
+            return super()._locked()
+        return _FileLock(self)
+
+    def _load(self):
+        if fcntl is None:
+            return super()._load()
+        self._file.seek(0)
+        data = self._file.read(self.STATE.size)
+        if len(data) < self.STATE.size:
+            # Файл создан другим процессом, но еще не заполнен
+            return self.capacity, time.time()
+        return self.STATE.unpack(data)
+
+    def _save(self, tokens, updated):
+        if fcntl is None:
+            return super()._save(tokens, updated)
+        self._file.seek(0)
+        self._file.write(self.STATE.pack(tokens, updated))
+        self._file.flush()
+
+
+class CircuitBreaker:
+    """Размыкатель цепи: после failure_threshold отказов подряд запросы
+    отклоняются reset_timeout секунд, затем пропускается пробный запрос."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probe_in_flight:
+                raise CircuitOpenError(
+                    f"Размыкатель открыт после {self._failures} отказов подряд")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class RetryStats:
+    """Счетчики повторов и ожиданий, чтобы они не скрывали проблемы с задержками"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.rate_limit_seconds = 0.0
+        self.circuit_rejections = 0
+
+    def add(self, retries=0, backoff_seconds=0.0, rate_limit_seconds=0.0, circuit_rejections=0):
+        with self._lock:
+            self.retries += retries
+            self.backoff_seconds += backoff_seconds
+            self.rate_limit_seconds += rate_limit_seconds
+            self.circuit_rejections += circuit_rejections
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "backoff_seconds": self.backoff_seconds,
+                "rate_limit_seconds": self.rate_limit_seconds,
+                "circuit_rejections": self.circuit_rejections,
+            }
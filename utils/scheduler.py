@@ -0,0 +1,92 @@
+from statistics import median
+
+from utils.parallel import group_items
+
+FAILED_OUTCOMES = ("failed", "error")
+
+
+class RunHistory:
+    """Сведения о тестах из истории прогонов для планирования следующего.
+
+    durations — медиана длительности теста, failures — число падений за
+    последние recent_runs его прогонов, endpoints — запросы, которые тест
+    выполнял.
+    """
+
+    def __init__(self, durations=None, failures=None, endpoints=None):
+        self.durations = durations or {}
+        self.failures = failures or {}
+        self.endpoints = endpoints or {}
+
+    @classmethod
+    def from_store(cls, store, last_runs=20, recent_runs=5):
+        durations = {}
+        failures = {}
+        for nodeid, runs in store.test_history(last_runs).items():
+            measured = [duration for _, outcome, duration in runs if outcome != "skipped"]
+            if measured:
+                durations[nodeid] = median(measured)
+            failures[nodeid] = sum(outcome in FAILED_OUTCOMES
+                                   for _, outcome, _ in runs[-recent_runs:])
+        return cls(durations, failures, store.test_endpoints(last_runs))
+
+    def typical_duration(self):
+        """Длительность, принимаемая для тестов без истории"""
+        return median(self.durations.values()) if self.durations else 1.0
+
+
+def order_items(items, history, longest_first=False):
+    """Порядок выполнения: сначала недавно падавшие тесты.
+
+    При longest_first следом идут самые долгие, чтобы короткие тесты
+    заполняли хвост прогона. Тесты без истории считаются средними по
+    длительности. Сортировка устойчивая: при равенстве сохраняется порядок
+    объявления.
+    """
+    default = history.typical_duration()
+
+    def key(item):
+        failures = history.failures.get(item.nodeid, 0)
+        duration = history.durations.get(item.nodeid, default) if longest_first else 0.0
+        return -failures, -duration
+
+    return sorted(items, key=key)
+
+
+def group_weights(items, history):
+    """Вес групп тестов для assign_groups — ожидаемая длительность группы"""
+    default = history.typical_duration()
+    return {
+        key: sum(history.durations.get(item.nodeid, default) for item in group) or 1e-6
+        for key, group in group_items(items).items()
+    }
+
+
+def _matches(pattern, method, endpoint):
+    """Совпадение запроса с шаблоном "МЕТОД /путь" или "/путь" (по префиксу пути)"""
+    pattern_method, _, pattern_path = pattern.strip().rpartition(" ")
+    if pattern_method and pattern_method.upper() != method:
+        return False
+    path = endpoint.split("?", 1)[0]
+    prefix = pattern_path.rstrip("/")
+    return path == prefix or path.startswith(prefix + "/") or endpoint == pattern_path
+
+
+def select_changed(items, history, changed):
+    """Отбор тестов, затрагивающих измененные эндпоинты.
+
+    Тесты без истории запросов выбираются всегда: неизвестно, что они
+    проверяют.
+    """
+    patterns = [pattern for pattern in changed if pattern.strip()]
+    selected = []
+    deselected = []
+    for item in items:
+        endpoints = history.endpoints.get(item.nodeid)
+        if endpoints is None or any(_matches(pattern, method, endpoint)
+                                    for pattern in patterns
+                                    for method, endpoint in endpoints):
+            selected.append(item)
+        else:
+            deselected.append(item)
+    return selected, deselected
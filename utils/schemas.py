@@ -0,0 +1,121 @@
+_registry = {}
+
+# Значение-маркер отсутствующего поля
+_MISSING = object()
+
+
+class Schema:
+    """Декларативная схема ресурса API, компилируемая в функцию проверки.
+
+    fields — словарь {поле: тип или кортеж типов}. Проверка типов строгая
+    (type(value) is int), поэтому bool не проходит как int. Функция
+    проверки собирается один раз при создании схемы и проверяет сразу весь
+    список объектов, возвращая все нарушения, а не только первое.
+    """
+
+    def __init__(self, name, fields, required=None):
+        self.name = name
+        self.fields = dict(fields)
+        self.required = tuple(self.fields if required is None else required)
+        self._validate_many = self._compile()
+
+    def _compile(self):
+        required = frozenset(self.required)
+        required_order = self.required
+        # (поле, допустимые типы, их названия для сообщений) — один раз на схему
+        checks = []
+        for field, types in self.fields.items():
+            types = types if isinstance(types, tuple) else (types,)
+            checks.append((field, frozenset(types), " | ".join(t.__name__ for t in types)))
+        checks = tuple(checks)
+        name = self.name
+
+        def explain(index, item, append):
+            if type(item) is not dict:
+                append(f"[{index}] {name}: ожидался объект, получен {type(item).__name__}")
+                return
+            for field in required_order:
+                if field not in item:
+                    append(f"[{index}] Отсутствует поле {field}")
+            for field, types, names in checks:
+                value = item.get(field, _MISSING)
+                if value is not _MISSING and type(value) not in types:
+                    append(f"[{index}] Поле {field} должно быть {names}, "
+                           f"получено {type(value).__name__}: {value!r:.50}")
+
+        # Для быстрой проверки: обязательные поля уже есть в объекте
+        required_checks = tuple((field, types) for field, types, _ in checks if field in required)
+        optional_checks = tuple((field, types) for field, types, _ in checks if field not in required)
+
+        def validate_many(items, start=0):
+            errors = []
+            for index, item in enumerate(items, start):
+                # Корректные объекты проходят быстрой проверкой; подробный
+                # разбор нарушений выполняется только для остальных
+                if type(item) is dict and required <= item.keys():
+                    for field, types in required_checks:
+                        if type(item[field]) not in types:
+                            break
+                    else:
+                        for field, types in optional_checks:
+                            value = item.get(field, _MISSING)
+                            if value is not _MISSING and type(value) not in types:
+                                break
+                        else:
+                            continue
+                explain(index, item, errors.append)
+            return errors
+
+        return validate_many
+
+    def validate_many(self, items, start=0):
+        """Все нарушения схемы в списке объектов"""
+        return self._validate_many(items, start)
+
+    def validate(self, item):
+        """Нарушения схемы в одном объекте"""
+        return self._validate_many((item,))
+
+    def assert_valid(self, items):
+        """Проверка одного объекта или списка с выводом всех нарушений сразу"""
+        errors = self.validate(items) if isinstance(items, dict) else self.validate_many(items)
+        assert not errors, self._message(errors)
+
+    def assert_valid_stream(self, items, batch_size=1000):
+        """Пакетная проверка потока объектов; возвращает их число"""
+        errors = []
+        batch = []
+        count = 0
+        for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                errors += self._validate_many(batch, count)
+                count += len(batch)
+                batch = []
+        if batch:
+            errors += self._validate_many(batch, count)
+            count += len(batch)
+        assert not errors, self._message(errors)
+        return count
+
+    def _message(self, errors, limit=20):
+        shown = "\n".join(errors[:limit])
+        more = f"\n... и еще {len(errors) - limit}" if len(errors) > limit else ""
+        return f"Нарушения схемы {self.name} ({len(errors)}):\n{shown}{more}"
+
+
+def register_schema(schema):
+    _registry[schema.name] = schema
+    return schema
+
+
+def get_schema(name):
+    return _registry[name]
+
+
+POST_SCHEMA = register_schema(Schema("Post", {
+    "userId": int,
+    "id": int,
+    "title": str,
+    "body": str,
+}))
@@ -0,0 +1,89 @@
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r"\s*")
+DELIMITERS = " \t\r\n,]"
+
+
+def iter_json_array(chunks):
+    """Потоковый разбор JSON массива верхнего уровня по элементам.
+
+    chunks — итератор строковых фрагментов документа. В памяти держится
+    только текущий фрагмент и недочитанный элемент, а не весь массив.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+
+    def read_more():
+        nonlocal buffer, pos, exhausted
+        for chunk in chunks:
+            if chunk:
+                # Отбрасываем уже разобранную часть буфера
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                return True
+        exhausted = True
+        return False
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            pos = WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or not read_more():
+                return pos < len(buffer)
+
+    if not skip_whitespace() or buffer[pos] != "[":
+        raise ValueError("Ожидался JSON массив")
+    pos += 1
+
+    first = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Неожиданный конец JSON массива")
+        if buffer[pos] == "]":
+            return
+        if not first:
+            if buffer[pos] != ",":
+                raise ValueError(f"Ожидалась ',' в позиции {pos}")
+            pos += 1
+            if not skip_whitespace():
+                raise ValueError("Неожиданный конец JSON массива")
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Элемент еще не дочитан целиком
+                if not read_more():
+                    raise
+                continue
+            # Число вроде "12" или "1." может продолжаться в следующем
+            # фрагменте, поэтому элемент принимается только вместе с
+            # разделителем после него
+            delimited = end < len(buffer) and buffer[end] in DELIMITERS
+            if not delimited and not exhausted and read_more():
+                continue
+            break
+
+        pos = end
+        first = False
+        yield item
+
+
+def iter_json_items(response, chunk_size=64 * 1024):
+    """Элементы JSON массива из ответа, полученного с stream=True"""
+    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="strict")
+
+    def text_chunks():
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+    try:
+        yield from iter_json_array(text_chunks())
+    finally:
+        response.close()
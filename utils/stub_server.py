@@ -0,0 +1,187 @@
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+POST_PATH = re.compile(r"^/posts/(\d+)/?$")
+
+
+def generate_posts(count=100, posts_per_user=10):
+    """Детерминированный набор постов в формате JSONPlaceholder"""
+    return [
+        {
+            "userId": (post_id - 1) // posts_per_user + 1,
+            "id": post_id,
+            "title": f"post title {post_id}",
+            "body": f"post body {post_id}\nline two of post {post_id}",
+        }
+        for post_id in range(1, count + 1)
+    ]
+
+
+class PostsRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик контракта /posts, на который опираются тесты.
+
+    Как и JSONPlaceholder, сервер не сохраняет изменения: POST/PUT/PATCH
+    возвращают результат операции, но данные остаются исходными.
+    """
+
+    # HTTP/1.1 нужен для keep-alive, поэтому каждый ответ содержит Content-Length
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело уходят одной записью, иначе связка Nagle и delayed ACK
+    # добавляет к каждому ответу по keep-alive соединению ~40 мс
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def posts(self):
+        return self.server.posts
+
+    def _send_json(self, status, payload, etag=False):
+        body = json.dumps(payload).encode("utf-8")
+        if etag:
+            tag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == tag:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def _post_id(self, path):
+        match = POST_PATH.match(path)
+        return int(match.group(1)) if match else None
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path.rstrip("/") == "/posts":
+            posts = self.posts
+            user_ids = parse_qs(parts.query).get("userId")
+            if user_ids:
+                wanted = {int(user_id) for user_id in user_ids if user_id.isdigit()}
+                posts = [post for post in posts if post["userId"] in wanted]
+            self._send_json(200, posts, etag=True)
+            return
+
+        post_id = self._post_id(parts.path)
+        post = self.server.posts_by_id.get(post_id)
+        if post is None:
+            self._send_json(404, {})
+            return
+        self._send_json(200, post, etag=True)
+
+    def _handle_write(self, method):
+        path = urlsplit(self.path).path
+        try:
+            data = self._read_json()
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        if not isinstance(data, dict):
+            self._send_json(400, {"error": "JSON object expected"})
+            return
+
+        if path.rstrip("/") == "/posts" and method == "POST":
+            self._send_json(201, {**data, "id": len(self.posts) + 1})
+            return
+
+        post_id = self._post_id(path)
+        if post_id is None:
+            self._send_json(404, {})
+            return
+        existing = self.server.posts_by_id.get(post_id)
+
+        if method == "PUT":
+            if existing is None:
+                self._send_json(404, {})
+            else:
+                self._send_json(200, {**data, "id": post_id})
+        elif method == "PATCH":
+            # Для несуществующего поста JSONPlaceholder возвращает присланные поля
+            merged = {**(existing or {}), **data}
+            if existing is not None:
+                merged["id"] = post_id
+            self._send_json(200, merged)
+        else:
+            self._send_json(200, {})
+
+    def do_POST(self):
+        self._handle_write("POST")
+
+    def do_PUT(self):
+        self._handle_write("PUT")
+
+    def do_PATCH(self):
+        self._handle_write("PATCH")
+
+    def do_DELETE(self):
+        self._handle_write("DELETE")
+
+
+class StubServer:
+    """Локальный HTTP сервер с API /posts, работающий в фоновом потоке"""
+
+    def __init__(self, host="127.0.0.1", port=0, posts=None):
+        self.httpd = ThreadingHTTPServer((host, port), PostsRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.posts = posts if posts is not None else generate_posts()
+        self.httpd.posts_by_id = {post["id"]: post for post in self.httpd.posts}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        # Короткий интервал опроса, чтобы stop() не ждал по полсекунды
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Локальный сервер API /posts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server = StubServer(args.host, args.port)
+    print(f"Сервер запущен: {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
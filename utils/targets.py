@@ -0,0 +1,97 @@
+import json
+from urllib.parse import urlsplit
+
+from utils.results import cases_from_junit
+
+
+def target_labels(urls):
+    """Короткие метки целей по хосту URL; совпадающие хосты нумеруются"""
+    labels = []
+    for url in urls:
+        parts = urlsplit(url)
+        label = parts.netloc or url
+        if parts.path.strip("/"):
+            label += parts.path.rstrip("/")
+        base, number = label, 2
+        while label in labels:
+            label = f"{base}#{number}"
+            number += 1
+        labels.append(label)
+    return labels
+
+
+def compare_targets(targets):
+    """Сравнение прогонов одного набора тестов на нескольких целях.
+
+    targets — список (метка, путь к JUnit XML, путь к отчету о задержках).
+    Возвращает задержки по эндпоинтам и исходы тестов для каждой цели;
+    тесты с разными исходами на разных целях отмечены consistent=False.
+    """
+    labels = [label for label, _, _ in targets]
+    endpoints = {}
+    tests = {}
+    for label, junit_path, latency_path in targets:
+        if latency_path:
+            with open(latency_path, encoding="utf-8") as f:
+                for row in json.load(f)["summary"]:
+                    key = (row["method"], row["endpoint"])
+                    endpoints.setdefault(key, {})[label] = {
+                        name: row[name] for name in ("count", "p50", "p95", "p99", "max")}
+        if junit_path:
+            for case in cases_from_junit(junit_path):
+                tests.setdefault(case["nodeid"], {})[label] = case["outcome"]
+
+    return {
+        "targets": labels,
+        "endpoints": [
+            {"method": method, "endpoint": endpoint, "targets": stats}
+            for (method, endpoint), stats in sorted(endpoints.items())
+        ],
+        "tests": [
+            {
+                "nodeid": nodeid,
+                "outcomes": outcomes,
+                "consistent": len(set(outcomes.get(label, "missing") for label in labels)) == 1,
+            }
+            for nodeid, outcomes in sorted(tests.items())
+        ],
+    }
+
+
+def format_comparison(comparison, width=18):
+    """Таблица p50/p95 по эндпоинтам бок о бок и расхождения исходов тестов"""
+    labels = comparison["targets"]
+    header = f"{'endpoint':<32}" + "".join(f" {label[:width]:>{width}}" for label in labels)
+    lines = ["Задержки p50 / p95, мс:", header]
+    for row in comparison["endpoints"]:
+        cells = []
+        for label in labels:
+            stats = row["targets"].get(label)
+            cell = f"{stats['p50'] * 1000:.1f} / {stats['p95'] * 1000:.1f}" if stats else "—"
+            cells.append(f" {cell:>{width}}")
+        lines.append(f"{row['method'] + ' ' + row['endpoint']:<32}" + "".join(cells))
+
+    outcomes = {label: {} for label in labels}
+    for test in comparison["tests"]:
+        for label in labels:
+            outcome = test["outcomes"].get(label, "missing")
+            outcomes[label][outcome] = outcomes[label].get(outcome, 0) + 1
+    lines.append("")
+    lines.append("Исходы тестов:")
+    for label in labels:
+        counts = ", ".join(f"{name} {count}" for name, count in sorted(outcomes[label].items()))
+        lines.append(f"  {label}: {counts}")
+    differing = [test for test in comparison["tests"] if not test["consistent"]]
+    if differing:
+        lines.append("Разные исходы на целях:")
+        for test in differing:
+            per_target = ", ".join(f"{label}={test['outcomes'].get(label, 'missing')}"
+                                   for label in labels)
+            lines.append(f"  {test['nodeid']}: {per_target}")
+    return "\n".join(lines)
+
+
+def write_comparison(comparison, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(comparison, f, ensure_ascii=False, indent=2)
+    return path
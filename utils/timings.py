@@ -0,0 +1,246 @@
+import json
+import socket
+import threading
+import time
+from urllib.parse import urlencode
+
+# Замер текущего запроса, который соединения urllib3 дополняют фазами
+_current = threading.local()
+
+
+def percentile(sorted_values, p):
+    """Перцентиль p (0..100) отсортированного списка с линейной интерполяцией"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def endpoint_label(endpoint, params=None):
+    """Метка эндпоинта для группировки: путь и query-параметры запроса"""
+    if not params:
+        return endpoint
+    separator = "&" if "?" in endpoint else "?"
+    return f"{endpoint}{separator}{urlencode(sorted(params.items()), doseq=True)}"
+
+
+class RequestTiming:
+    """Фазы одного HTTP запроса в секундах.
+
+    dns, connect и tls равны нулю, если запрос ушел по уже открытому
+    соединению, и None вместе с ttfb, если соединение не замерялось
+    (SOCKS прокси, ответ из кассеты). ttfb и total отсчитываются от
+    начала попытки. attempt — номер попытки (0 — первая), wait — время в
+    backoff и в ожидании ограничителя частоты перед ней; в total оно не
+    входит.
+    """
+
+    FIELDS = ("method", "endpoint", "test", "status", "dns", "connect", "tls",
+              "ttfb", "total", "request_bytes", "response_bytes", "attempt", "wait")
+
+    def __init__(self, method, endpoint, test=None):
+        self.method = method
+        self.endpoint = endpoint
+        self.test = test
+        self.status = None
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = None
+        self.total = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.attempt = 0
+        self.wait = 0.0
+        self.started = time.perf_counter()
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class TimedConnectionMixin:
+    """Примесь к соединению urllib3, замеряющая DNS, TCP connect, TLS и TTFB"""
+
+    def _new_conn(self):
+        timing = getattr(_current, "timing", None)
+        if timing is None:
+            return super()._new_conn()
+
+        # urllib3 импортируется здесь, чтобы функции отчетов модуля не
+        # тянули его в процесс, объединяющий отчеты воркеров
+        from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+        from urllib3.util.connection import allowed_gai_family
+
+        started = time.perf_counter()
+        host = self._dns_host
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            # Ошибку разрешения имени сформирует сам urllib3
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timing.dns += resolved - started
+
+        # Подключаемся к уже разрешенным адресам по очереди, как
+        # create_connection в urllib3, чтобы DNS не замерялся повторно;
+        # SNI и заголовок Host используют исходное имя
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as exc:
+                    error = exc
+            raise error
+        finally:
+            self._dns_host = host
+            timing.connect += time.perf_counter() - resolved
+
+    def connect(self):
+        timing = getattr(_current, "timing", None)
+        if timing is None or not hasattr(self, "ssl_context"):
+            return super().connect()
+
+        before = timing.dns + timing.connect
+        started = time.perf_counter()
+        super().connect()
+        # Все, что сверх DNS и TCP внутри connect(), — TLS рукопожатие
+        elapsed = time.perf_counter() - started
+        timing.tls += max(elapsed - (timing.dns + timing.connect - before), 0.0)
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        timing = getattr(_current, "timing", None)
+        if timing is not None:
+            timing.ttfb = time.perf_counter() - timing.started
+        return response
+
+
+def _track_stream(timing, response):
+    """Досчет total и response_bytes потокового ответа (stream=True).
+
+    Тело такого ответа читается уже после finish(), поэтому замер
+    обновляется, когда тело прочитано до конца или ответ закрыт: в total
+    входит загрузка тела, в response_bytes — фактически полученные байты
+    (у chunked ответов Content-Length нет).
+    """
+    iter_content = response.iter_content
+    close = response.close
+    received = 0
+    finished = False
+
+    def finish_stream():
+        nonlocal finished
+        if not finished:
+            finished = True
+            timing.total = time.perf_counter() - timing.started
+            timing.response_bytes = received
+
+    def counting_iter_content(*args, **kwargs):
+        nonlocal received
+        for chunk in iter_content(*args, **kwargs):
+            received += len(chunk.encode(response.encoding or "utf-8") if isinstance(chunk, str) else chunk)
+            yield chunk
+        finish_stream()
+
+    def closing_close():
+        finish_stream()
+        close()
+
+    response.iter_content = counting_iter_content
+    response.close = closing_close
+
+
+class TimingCollector:
+    """Потокобезопасный сборщик замеров запросов ApiClient.
+
+    В context хранится идентификатор текущего теста (node ID), которым
+    помечаются все замеры, в том числе из рабочих потоков AsyncApiClient.
+    При keep=False замеры не накапливаются (долгая нагрузка): они
+    по-прежнему доступны через возвращаемые start() объекты.
+    """
+
+    def __init__(self, keep=True):
+        self._lock = threading.Lock()
+        self.keep = keep
+        self.records = []
+        self._by_test = {}
+        self.context = None
+
+    def start(self, method, endpoint):
+        timing = RequestTiming(method, endpoint, self.context)
+        _current.timing = timing
+        return timing
+
+    def finish(self, timing, response=None):
+        timing.total = time.perf_counter() - timing.started
+        _current.timing = None
+        if response is not None:
+            timing.status = response.status_code
+            body = response.request.body if response.request is not None else None
+            timing.request_bytes = len(body) if body else 0
+            if response._content_consumed:
+                timing.response_bytes = len(response.content)
+            else:
+                # Потоковый ответ: до чтения тела известен только Content-Length
+                timing.response_bytes = int(response.headers.get("Content-Length", 0))
+                _track_stream(timing, response)
+        if timing.ttfb is None:
+            # Ответ получен не через замеряемое соединение: нули были бы ложными
+            timing.dns = timing.connect = timing.tls = None
+        if not self.keep:
+            return
+        with self._lock:
+            self.records.append(timing)
+            self._by_test.setdefault(timing.test, []).append(timing)
+
+    def records_for(self, test):
+        with self._lock:
+            return list(self._by_test.get(test, ()))
+
+    def summary(self):
+        return summarize([timing.to_dict() for timing in self.records])
+
+    def write_json(self, path):
+        write_latency_report([timing.to_dict() for timing in self.records], path)
+
+
+def summarize(records):
+    """p50/p95/p99/max полного времени запроса по (метод, эндпоинт)"""
+    groups = {}
+    for record in records:
+        groups.setdefault((record["method"], record["endpoint"]), []).append(record["total"])
+    summary = {}
+    for key, totals in sorted(groups.items()):
+        totals.sort()
+        summary[key] = {
+            "count": len(totals),
+            "p50": percentile(totals, 50),
+            "p95": percentile(totals, 95),
+            "p99": percentile(totals, 99),
+            "max": totals[-1],
+        }
+    return summary
+
+
+def write_latency_report(records, path):
+    """Запись замеров и сводки перцентилей в JSON"""
+    summary = [
+        {"method": method, "endpoint": endpoint, **stats}
+        for (method, endpoint), stats in summarize(records).items()
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "requests": records}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def merge_latency_reports(report_paths, output_path):
+    """Объединение JSON отчетов о задержках от нескольких воркеров"""
+    records = []
+    for path in report_paths:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.load(f)["requests"])
+    return write_latency_report(records, output_path)
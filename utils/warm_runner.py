@@ -0,0 +1,324 @@
+import importlib
+import os
+import re
+import secrets
+import signal
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+SOCKET_NAME = "runner.sock"
+KEY_NAME = "runner.key"
+
+# Модули, импортируемые сервером один раз до обработки запусков. Модули
+# тестов, conftest и плагины pytest сюда не входят: pytest переписывает их
+# assert при импорте, а уже импортированный модуль переписать нельзя
+PRELOAD_MODULES = (
+    "pytest",
+    "_pytest.junitxml",
+    "jinja2",
+    "requests",
+    "urllib3",
+    "utils.api_client",
+    "utils.async_client",
+    "utils.datasets",
+    "utils.html_report",
+    "utils.results_store",
+    "utils.scheduler",
+    "utils.stub_server",
+    "utils.schemas",
+    "utils.streaming",
+)
+
+
+def runtime_dir():
+    """Каталог сокета и ключа сервера, доступный только текущему пользователю.
+
+    Сервер выполняет pytest с аргументами, рабочим каталогом и окружением
+    клиента, поэтому подключиться к нему может только владелец: сокет
+    AF_UNIX лежит в каталоге 0700, ключ аутентификации — в файле 0600.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    path = os.path.join(base, f"api-tests-runner-{os.getuid()}")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"Каталог сервера запусков {path} должен принадлежать "
+                           f"текущему пользователю и иметь права 0700")
+    return path
+
+
+def default_address():
+    return os.path.join(runtime_dir(), SOCKET_NAME)
+
+
+def create_authkey():
+    """Новый случайный ключ сервера, сохраняемый в файл с правами 0600"""
+    key = secrets.token_bytes(32)
+    path = os.path.join(runtime_dir(), KEY_NAME)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        os.fchmod(f.fileno(), 0o600)
+        f.write(key)
+    return key
+
+
+def read_authkey():
+    """Ключ запущенного сервера; FileNotFoundError, если сервер не запускался"""
+    with open(os.path.join(runtime_dir(), KEY_NAME), "rb") as f:
+        return f.read()
+
+
+def preload(modules=PRELOAD_MODULES):
+    """Импорт модулей заранее; недоступные модули пропускаются"""
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        loaded.append(name)
+    return loaded
+
+
+class WarmRunnerServer:
+    """Сервер запусков pytest с заранее импортированными модулями.
+
+    На каждый запрос сервер выполняет fork: дочерний процесс наследует уже
+    импортированные pytest, requests и модули utils и запускает pytest.main
+    с чистым состоянием, не влияя на следующие запуски. Вывод дочернего
+    процесса (stdout и stderr) передается клиенту по мере появления.
+    Запросы принимаются в одном потоке, поэтому fork безопасен.
+    Сервер слушает сокет AF_UNIX в runtime_dir() и при каждом старте
+    создает новый случайный ключ аутентификации.
+    """
+
+    def __init__(self, address=None, root=None):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Сервер запусков требует os.fork (Linux/macOS)")
+        self.address = address or default_address()
+        self.root = root or os.getcwd()
+        self._children = set()
+
+    def serve_forever(self):
+        if self.root not in sys.path:
+            sys.path.insert(0, self.root)
+        if os.path.exists(self.address):
+            if server_available(self.address):
+                raise RuntimeError(f"Сервер запусков уже работает на {self.address}")
+            # Сокет, оставшийся от аварийно завершенного сервера
+            os.unlink(self.address)
+        authkey = create_authkey()
+        loaded = preload()
+        print(f"Предзагружено модулей: {len(loaded)}; ожидание запусков на {self.address}")
+        try:
+            with Listener(self.address, family="AF_UNIX", authkey=authkey) as listener:
+                os.chmod(self.address, 0o600)
+                self._serve(listener)
+        finally:
+            for path in (self.address, os.path.join(runtime_dir(), KEY_NAME)):
+                if os.path.exists(path):
+                    os.unlink(path)
+        for pid in list(self._children):
+            os.waitpid(pid, 0)
+
+    def _serve(self, listener):
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                # Клиент без верного ключа или оборвавший рукопожатие
+                continue
+            self._reap()
+            try:
+                request = conn.recv()
+            except EOFError:
+                conn.close()
+                continue
+            if request.get("command") == "ping":
+                conn.send({"exit": 0})
+                conn.close()
+                continue
+            if request.get("command") == "stop":
+                conn.send({"exit": 0})
+                conn.close()
+                return
+            pid = os.fork()
+            if pid == 0:
+                self._run_child(conn, request)
+            self._children.add(pid)
+            conn.close()
+
+    def _reap(self):
+        for pid in list(self._children):
+            finished, _ = os.waitpid(pid, os.WNOHANG)
+            if finished:
+                self._children.discard(pid)
+
+    def _run_child(self, conn, request):
+        """Выполнение запуска в дочернем процессе; не возвращает управление"""
+        code = 1
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            os.chdir(request.get("cwd") or self.root)
+            # Окружение запуска — окружение клиента, а не сервера
+            if request.get("env") is not None:
+                os.environ.clear()
+                os.environ.update(request["env"])
+            read_fd, write_fd = os.pipe()
+            relay = threading.Thread(target=_relay_output, args=(read_fd, conn), daemon=True)
+            relay.start()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(write_fd, 1)
+            os.dup2(write_fd, 2)
+            os.close(write_fd)
+            try:
+                import pytest
+
+                code = int(pytest.main(list(request["args"])))
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                # Закрываем запись в канал, чтобы поток пересылки дочитал вывод
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                os.dup2(devnull, 1)
+                os.dup2(devnull, 2)
+                relay.join()
+            conn.send({"exit": code})
+        finally:
+            os._exit(code)
+
+
+def _relay_output(read_fd, conn):
+    with os.fdopen(read_fd, "rb") as pipe:
+        while True:
+            chunk = pipe.read1(64 * 1024)
+            if not chunk:
+                break
+            conn.send({"output": chunk.decode("utf-8", errors="replace")})
+
+
+def _connect(address=None):
+    address = address or default_address()
+    return Client(address, family="AF_UNIX", authkey=read_authkey())
+
+
+def run_via_server(args, output=None, address=None, cwd=None, env=None):
+    """Запуск pytest с аргументами args на сервере; возвращает код выхода.
+
+    Вывод пишется в output (по умолчанию sys.stdout) по мере получения.
+    pytest выполняется с окружением env (по умолчанию текущее окружение).
+    Если сервер не запущен, выбрасывается OSError.
+    """
+    output = output or sys.stdout
+    with _connect(address) as conn:
+        conn.send({"args": list(args), "cwd": cwd or os.getcwd(),
+                   "env": dict(os.environ if env is None else env)})
+        while True:
+            message = conn.recv()
+            if "output" in message:
+                output.write(message["output"])
+                output.flush()
+            else:
+                return message["exit"]
+
+
+def server_available(address=None):
+    try:
+        with _connect(address) as conn:
+            conn.send({"command": "ping"})
+            return conn.recv()["exit"] == 0
+    except (OSError, EOFError, AuthenticationError):
+        return False
+
+
+def stop_server(address=None):
+    try:
+        with _connect(address) as conn:
+            conn.send({"command": "stop"})
+            return conn.recv()["exit"]
+    except (OSError, EOFError):
+        # Нет файла ключа или сокета: сервер не запускался или уже остановлен
+        print("Сервер запусков не запущен")
+        return 1
+
+
+class RemoteRun:
+    """Запуск на сервере в фоновом потоке с интерфейсом, как у subprocess.Popen.
+
+    Вывод пишется в файл log_path по мере получения.
+    """
+
+    def __init__(self, args, log_path, **kwargs):
+        self.returncode = None
+        self._thread = threading.Thread(target=self._run, args=(args, log_path, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, args, log_path, kwargs):
+        with open(log_path, "w", encoding="utf-8") as log:
+            try:
+                self.returncode = run_via_server(args, log, **kwargs)
+            except (OSError, EOFError, AuthenticationError) as error:
+                log.write(f"\nОшибка связи с сервером запусков: {error}\n")
+                self.returncode = 1
+
+    def wait(self):
+        self._thread.join()
+        return self.returncode
+
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(modules=PRELOAD_MODULES, top=15, root=None):
+    """Профиль времени импорта в холодном интерпретаторе (python -X importtime).
+
+    Возвращает (общее время в мс, [(кумулятивное время в мс, модуль), ...])
+    для модулей верхнего уровня, отсортированных по убыванию времени.
+    """
+    statements = "\n".join(
+        f"try:\n    import {name}\nexcept ImportError:\n    pass" for name in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statements],
+        cwd=root or os.getcwd(), capture_output=True, text=True)
+    entries = []
+    total = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative = int(match.group(2)) / 1000
+        # Вложенные импорты отмечены отступом; в сумму идут только верхние
+        if len(match.group(3)) == 1:
+            total += cumulative
+            entries.append((cumulative, match.group(4)))
+    entries.sort(reverse=True)
+    return total, entries[:top]
+
+
+def format_import_profile(total, entries, budget_ms=None):
+    lines = [f"{'мс':>9}  модуль"]
+    lines += [f"{cumulative:>9.1f}  {name}" for cumulative, name in entries]
+    status = ""
+    if budget_ms is not None:
+        status = " — в пределах бюджета" if total <= budget_ms else f" — превышен бюджет {budget_ms:g} мс"
+    lines.append(f"Итого импорт: {total:.1f} мс{status}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Сервер запусков pytest с прогретыми импортами")
+    parser.add_argument("--socket", default=None,
+                        help="Путь к сокету AF_UNIX (по умолчанию в runtime_dir())")
+    parser.add_argument("--stop", action="store_true", help="Остановить запущенный сервер")
+    args = parser.parse_args()
+    if args.stop:
+        sys.exit(stop_server(args.socket))
+    WarmRunnerServer(args.socket).serve_forever()